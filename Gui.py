@@ -1,10 +1,16 @@
 from optimizer import SensorOptimizer
+from base import OptimizationCancelled
+from session import DatasetSession
+from plotting import downsample_nodes
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import numpy as np
+import itertools
 import os
+import queue
+import threading
 
 class SensorPlacementGUI:
     def __init__(self, root):
@@ -20,6 +26,14 @@ class SensorPlacementGUI:
         self.xyz_file = None
         self.mode_files = []
         self.optimizer = None
+        self.optimizers = {}  # Optimizer that produced each result
+        self.session = DatasetSession()  # Parsed inputs shared by all runs
+        self.display_max_points = 5000  # Background nodes drawn in the result plot
+        self.result_views = {}  # Rendered plot and table rows per result
+        self.current_view_frame = None
+        self.jobs = {}  # Running background jobs by id
+        self.job_ids = itertools.count(1)
+        self.job_queue = queue.Queue()
         self.current_view = tk.StringVar(value="")
         self.available_modes = []  # Store available modes
         self.mode_selection = []   # Store selected modes
@@ -28,6 +42,9 @@ class SensorPlacementGUI:
         self.create_input_frame()
         self.create_method_frame()
         self.create_results_frame()
+        
+        # Poll background jobs from the Tk main loop
+        self.root.after(100, self.poll_jobs)
     
     def create_input_frame(self):
         input_frame = ttk.LabelFrame(self.root, text="Input Parameters", padding=10)
@@ -45,7 +62,9 @@ class SensorPlacementGUI:
         
         # Number of sensors
         ttk.Label(mode_frame, text="N. Sensors").grid(row=0, column=2, padx=5)
-        ttk.Entry(mode_frame, textvariable=self.n_sensors, width=10).grid(row=0, column=3, padx=5)
+        sensor_entry = ttk.Entry(mode_frame, textvariable=self.n_sensors, width=10)
+        sensor_entry.grid(row=0, column=3, padx=5)
+        sensor_entry.bind('<Return>', self.update_sensor_count)
         
         # File input
         ttk.Label(input_frame, text="Input Files").grid(row=2, column=0, padx=5, pady=5)
@@ -115,9 +134,11 @@ class SensorPlacementGUI:
         # Checkbuttons for methods
         self.efi_var = tk.BooleanVar()
         self.efi_dpr_var = tk.BooleanVar()
+        self.forward_var = tk.BooleanVar()
         
         ttk.Checkbutton(method_frame, text="EFI", variable=self.efi_var).grid(row=0, column=0, padx=5)
         ttk.Checkbutton(method_frame, text="EFI-DPR", variable=self.efi_dpr_var).grid(row=0, column=1, padx=5)
+        ttk.Checkbutton(method_frame, text="Forward", variable=self.forward_var).grid(row=0, column=2, padx=5)
         
         # Buttons
         ttk.Button(method_frame, text="select all", command=self.select_all).grid(row=0, column=3, padx=5, pady=10)
@@ -125,6 +146,13 @@ class SensorPlacementGUI:
         ttk.Button(method_frame, text="OSP", command=self.run_osp).grid(row=1, column=1, padx=5, pady=10)
         ttk.Button(method_frame, text="EFI-genetic algo", command=self.run_efi_genetic).grid(row=1, column=2, padx=5, pady=10)
         ttk.Button(method_frame, text="EFI-DPR-genetic algo", command=self.run_efi_dpr_genetic).grid(row=1, column=3, padx=5, pady=10)
+        
+        # Progress of background jobs
+        self.progress = ttk.Progressbar(method_frame, orient="horizontal", length=300, mode="determinate", maximum=1.0)
+        self.progress.grid(row=2, column=0, columnspan=3, padx=5, pady=5, sticky="ew")
+        ttk.Button(method_frame, text="Cancel", command=self.cancel_jobs).grid(row=2, column=3, padx=5, pady=5)
+        self.job_status = tk.StringVar(value="Idle")
+        ttk.Label(method_frame, textvariable=self.job_status).grid(row=3, column=0, columnspan=4, padx=5, sticky="w")
 
     def on_nav_select(self, event):
         selection = self.nav_list.curselection()
@@ -132,15 +160,29 @@ class SensorPlacementGUI:
             selected_item = self.nav_list.get(selection[0])
             self.display_selected_result(selected_item)
     
+    def clear_results(self):
+        """Drop every result and its cached view, e.g. when the dataset changes"""
+        self.results_data.clear()
+        self.invalidate_result_views()
+        self.optimizers.clear()
+        self.nav_list.delete(0, tk.END)
+    
     def load_xyz_file(self):
         self.xyz_file = filedialog.askopenfilename(filetypes=[("Excel files", "*.xlsx")])
         if self.xyz_file:
+            # Results of the previous dataset, running or done, no longer apply
+            self.cancel_jobs()
+            self.jobs.clear()
+            self.clear_results()
             self.update_file_text()
             
     def load_mode_files(self):
         files = filedialog.askopenfilenames(filetypes=[("Excel files", "*.xlsx")])
         if files:
             self.mode_files = list(files)
+            self.cancel_jobs()
+            self.jobs.clear()
+            self.clear_results()
             
             # Group files by mode number
             x_files = [f for f in self.mode_files if 'DEFX' in f]
@@ -178,7 +220,7 @@ class SensorPlacementGUI:
             
             if n_modes <= 0:
                 messagebox.showerror("Error", "Please enter a valid number of modes")
-                return False
+                return None
             
             # Get files for all modes up to n_modes
             selected_files = []
@@ -190,81 +232,147 @@ class SensorPlacementGUI:
                     selected_files.extend([x_file, y_file, z_file])
                 except StopIteration:
                     messagebox.showerror("Error", f"Could not find complete set of files for mode {mode_num}")
-                    return False
+                    return None
                 
             # Initialize optimizer with selected mode files
             self.optimizer = SensorOptimizer(
                 xyz_file=self.xyz_file,
                 mode_files=selected_files,
-                target_sensors=n_sensors
+                target_sensors=n_sensors,
+                session=self.session
             )
-            return True
+            # Results are shown while their files are still being written;
+            # failed writes are reported from the main loop
+            self.optimizer.exporter.asynchronous = True
+            self.optimizer.exporter.error_callback = lambda e: self.job_queue.put(('export_error', None, str(e)))
+            return self.optimizer
         except Exception as e:
             messagebox.showerror("Error", f"Failed to initialize optimizer: {str(e)}")
-            return False
+            return None
             
     def run_osp(self):
         if not self.xyz_file or not self.mode_files:
             messagebox.showerror("Error", "Please load XYZ file and mode files first")
             return
             
-        if not self.efi_var.get() and not self.efi_dpr_var.get():
-            messagebox.showerror("Error", "Please select at least one method (EFI or EFI-DPR)")
+        if not self.efi_var.get() and not self.efi_dpr_var.get() and not self.forward_var.get():
+            messagebox.showerror("Error", "Please select at least one method (EFI, EFI-DPR or Forward)")
             return
             
-        try:
-            if not self.initialize_optimizer():
+        # Clear previous results
+        self.clear_results()
+        
+        # Each method runs as its own background job
+        if self.efi_var.get():
+            optimizer = self.initialize_optimizer()
+            if optimizer is None:
                 return
-                
-            # Clear previous results
-            self.results_data.clear()
-            self.nav_list.delete(0, tk.END)
+            self.start_job("EFI", optimizer, optimizer.optimize_positions)
             
-            if self.efi_var.get():
-                efi_results = self.optimizer.optimize_positions()
-                self.results_data["EFI"] = efi_results
-                self.nav_list.insert(tk.END, "EFI")
-                
-            if self.efi_dpr_var.get():
-                efi_dpr_results = self.optimizer.optimize_positions_dpr()
-                self.results_data["EFI-DPR"] = efi_dpr_results
-                self.nav_list.insert(tk.END, "EFI-DPR")
-                
-            # Select first result by default
-            if self.nav_list.size() > 0:
-                self.nav_list.select_set(0)
-                self.display_selected_result(self.nav_list.get(0))
-                
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
+        if self.efi_dpr_var.get():
+            optimizer = self.initialize_optimizer()
+            if optimizer is None:
+                return
+            self.start_job("EFI-DPR", optimizer, optimizer.optimize_positions_dpr)
+            
+        if self.forward_var.get():
+            optimizer = self.initialize_optimizer()
+            if optimizer is None:
+                return
+            self.start_job("Forward", optimizer, optimizer.optimize_positions_forward)
         
     def run_efi_genetic(self):
-        if not self.initialize_optimizer():
+        optimizer = self.initialize_optimizer()
+        if optimizer is None:
             return
-        try:
-            results = self.optimizer.optimize_positions_genetic(method='EFI')
-            self.results_data["GA-EFI"] = results
-            self.nav_list.insert(tk.END, "GA-EFI")
-            self.nav_list.select_clear(0, tk.END)
-            self.nav_list.select_set(tk.END)
-            self.display_selected_result("GA-EFI")
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
+        self.start_job("GA-EFI", optimizer, lambda: optimizer.optimize_positions_genetic(method='EFI'))
             
     def run_efi_dpr_genetic(self):
-        if not self.initialize_optimizer():
+        optimizer = self.initialize_optimizer()
+        if optimizer is None:
             return
+        self.start_job("GA-EFI-DPR", optimizer, lambda: optimizer.optimize_positions_genetic(method='EFI-DPR'))
+
+    def start_job(self, key, optimizer, run):
+        """Run an optimisation on a worker thread; results come back through job_queue"""
+        job_id = next(self.job_ids)
+        cancel_event = threading.Event()
+        
+        def progress(stage, fraction):
+            # Runs on the worker thread: stop at the next checkpoint once cancelled
+            if cancel_event.is_set():
+                raise OptimizationCancelled(key)
+            self.job_queue.put(('progress', job_id, fraction))
+        
+        def work():
+            try:
+                self.job_queue.put(('done', job_id, run()))
+            except OptimizationCancelled:
+                self.job_queue.put(('cancelled', job_id, None))
+            except Exception as e:
+                self.job_queue.put(('error', job_id, str(e)))
+        
+        optimizer.progress_callback = progress
+        self.jobs[job_id] = {'key': key, 'optimizer': optimizer, 'cancel': cancel_event, 'progress': 0.0}
+        threading.Thread(target=work, name=f"osp-{key}-{job_id}", daemon=True).start()
+        self.update_job_status()
+
+    def poll_jobs(self):
         try:
-            results = self.optimizer.optimize_positions_genetic(method='EFI-DPR')
-            self.results_data["GA-EFI-DPR"] = results
-            self.nav_list.insert(tk.END, "GA-EFI-DPR")
-            self.nav_list.select_clear(0, tk.END)
-            self.nav_list.select_set(tk.END)
-            self.display_selected_result("GA-EFI-DPR")
-        except Exception as e:
-            messagebox.showerror("Error", str(e))
+            while True:
+                kind, job_id, payload = self.job_queue.get_nowait()
+                if kind == 'export_error':
+                    messagebox.showerror("Error", f"Failed to save results: {payload}")
+                    continue
+                job = self.jobs.get(job_id)
+                if job is None:
+                    continue
+                if kind == 'progress':
+                    job['progress'] = payload
+                    continue
+                    
+                del self.jobs[job_id]
+                key = job['key']
+                if kind == 'done':
+                    self.results_data[key] = payload
+                    self.invalidate_result_views(key)
+                    self.optimizers[key] = job['optimizer']
+                    self.optimizer = job['optimizer']
+                    if key not in self.nav_list.get(0, tk.END):
+                        self.nav_list.insert(tk.END, key)
+                    self.nav_list.select_clear(0, tk.END)
+                    self.nav_list.select_set(list(self.nav_list.get(0, tk.END)).index(key))
+                    self.display_selected_result(key)
+                elif kind == 'error':
+                    messagebox.showerror("Error", f"{key}: {payload}")
+                else:
+                    print(f"{key} cancelled")
+        except queue.Empty:
+            pass
+        
+        self.update_job_status()
+        self.root.after(100, self.poll_jobs)
+
+    def update_job_status(self):
+        if not self.jobs:
+            self.progress['value'] = 0.0
+            self.job_status.set("Idle")
+            return
+        self.progress['value'] = np.mean([job['progress'] for job in self.jobs.values()])
+        self.job_status.set("Running: " + ", ".join(
+            f"{job['key']} ({job['progress']:.0%})" for job in self.jobs.values()))
+
+    def cancel_jobs(self):
+        for job in self.jobs.values():
+            job['cancel'].set()
+        if self.jobs:
+            self.job_status.set("Cancelling...")
             
     def clear_all(self):
+        # Stop running jobs and ignore their results
+        self.cancel_jobs()
+        self.jobs.clear()
+        
         # Clear file selections
         self.xyz_file = None
         self.mode_files = []
@@ -273,9 +381,11 @@ class SensorPlacementGUI:
         # Clear checkboxes
         self.efi_var.set(False)
         self.efi_dpr_var.set(False)
+        self.forward_var.set(False)
         
-        # Clear results data
+        # Clear results data and their rendered views
         self.results_data.clear()
+        self.invalidate_result_views()
         
         # Clear navigation list
         self.nav_list.delete(0, tk.END)
@@ -288,122 +398,156 @@ class SensorPlacementGUI:
         for widget in self.plot_frame.winfo_children():
             widget.destroy()
             
-        # Reset optimizer
+        # Reset optimizer and drop loaded data
         self.optimizer = None
+        self.optimizers.clear()
+        self.session.clear()
         
     def select_all(self):
         self.efi_var.set(True)
         self.efi_dpr_var.set(True)
+        self.forward_var.set(True)
 
     def display_selected_result(self, selected_item):
-    # Clear existing displays
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-            
-        for widget in self.plot_frame.winfo_children():
-            widget.destroy()
-            
         if selected_item not in self.results_data:
+            self.show_result_view(None)
             messagebox.showwarning("Warning", "No data available for selected method.")
             return
             
-        results = self.results_data[selected_item]
-        
         try:
-            # Update table with enhanced information including DOFs
-            positions = results['COO']
-            nodes = results['POS']
-            contributions = results['Ed']
-            
-            # Sort sensors by nodeId value
-            sorted_indices = np.argsort(nodes)[::-1]
-            
-            for rank, idx in enumerate(sorted_indices, 1):
-                coord = positions[idx]
-                node = nodes[idx]
-                contrib = contributions[idx]
-                
-                # Calculate DOFs based on selected modes
-                selected_modes = [i+1 for i in range(len(self.available_modes)) 
-                                if self.mode_listbox.selection_includes(i)]
-                dof_str = f"Modes {','.join(map(str, selected_modes))}"
-
-                self.tree.insert('', 'end', values=(
-                    f"{node}",         # Node ID
-                    f"{coord[0]:.2f}", # X coordinate
-                    f"{coord[1]:.2f}", # Y coordinate
-                    f"{coord[2]:.2f}"  # Z coordinate
-                ))
-            
-            # Rest of the visualization code remains the same...
-            # [Previous 3D visualization code goes here]
-            # Create 3D visualization
-            fig = plt.Figure(figsize=(8, 6))
-            ax = fig.add_subplot(111, projection='3d')
-            
-            # Plot all nodes if available
-            if self.optimizer and self.optimizer.nodes is not None:
-                all_nodes = self.optimizer.nodes
-                ax.scatter(all_nodes[:, 0], all_nodes[:, 1], all_nodes[:, 2],
-                          c='lightblue', marker='o', alpha=0.2, s=20,label='Available Nodes')
-            
-            # Plot selected sensors
-                ax.scatter(positions[:, 0], positions[:, 1], positions[:, 2],
-                            color='red',s=100, alpha=0.5, marker='o', label='Selected Sensors')
- 
-            # Add node labels for selected sensors
-            for i, (coord, node) in enumerate(zip(positions, nodes)):
-                ax.text(coord[0], coord[1], coord[2], f' {node}',
-                       fontsize=8, ha='left', va='bottom')
-            
-            # Set labels and title
-            ax.set_xlabel('X (mm)')
-            ax.set_ylabel('Y (mm)')
-            ax.set_zlabel('Z (mm)')
-            ax.set_title(f'Sensor Placement - {selected_item}')
-            
-            # Add legend
-            ax.legend()
-            
-            # Adjust view
-            ax.view_init(elev=30, azim=45)
-            
-            # Add interaction capabilities
-            def on_click(event):
-                if event.inaxes == ax:
-                    ax.view_init(elev=ax.elev, azim=ax.azim)
-                    canvas.draw()
-            
-            # Create toolbar for basic matplotlib interactions
-            canvas = FigureCanvasTkAgg(fig, self.plot_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-            
-            # Add navigation toolbar
-            from matplotlib.backends.backend_tkagg import NavigationToolbar2Tk
-            toolbar = NavigationToolbar2Tk(canvas, self.plot_frame)
-            toolbar.update()
-            
-            # Connect click event
-            canvas.mpl_connect('button_press_event', on_click)
-            
-            # Add summary information
-            summary_frame = ttk.Frame(self.plot_frame)
-            summary_frame.pack(fill=tk.X, pady=5)
-            
-            summary_text = (
-                f"Method: {selected_item}\n"
-                f"Total Sensors: {len(positions)}\n"
-            )
-            
-            summary_label = ttk.Label(summary_frame, text=summary_text, justify=tk.LEFT)
-            summary_label.pack(padx=5)
+            # Rendered views are cached per result and swapped in and out
+            view = self.result_views.get(selected_item)
+            if view is None:
+                view = self.build_result_view(selected_item, self.results_data[selected_item])
+                self.result_views[selected_item] = view
+            self.show_result_view(view)
             
         except Exception as e:
             messagebox.showerror("Error", f"Error displaying results: {str(e)}")
             print(f"Error in display_selected_result: {str(e)}")
             import traceback
             traceback.print_exc()
+
+    def show_result_view(self, view):
+        """Swap the displayed plot and table rows for a cached view (None clears them)"""
+        for item in self.tree.get_children():
+            self.tree.delete(item)
+        if self.current_view_frame is not None:
+            self.current_view_frame.pack_forget()
+            self.current_view_frame = None
+        if view is None:
+            return
+        for row in view['rows']:
+            self.tree.insert('', 'end', values=row)
+        view['frame'].pack(fill=tk.BOTH, expand=True)
+        self.current_view_frame = view['frame']
+
+    def invalidate_result_views(self, key=None):
+        """Drop the cached view of one result, or of every result when key is None"""
+        keys = list(self.result_views) if key is None else [key]
+        for key in keys:
+            view = self.result_views.pop(key, None)
+            if view is None:
+                continue
+            if view['frame'] is self.current_view_frame:
+                self.show_result_view(None)
+            view['frame'].destroy()
+
+    def build_result_view(self, selected_item, results):
+        """
+        Render the plot and table rows of one result.
+
+        Args:
+            selected_item (str): Result key shown in the navigation list
+            results (dict): Results with 'POS', 'COO' and 'Ed'
+
+        Returns:
+            dict: 'frame' holding the canvas, toolbar and summary, and the table 'rows'
+        """
+        # Update table with enhanced information including DOFs
+        positions = results['COO']
+        nodes = results['POS']
+        
+        # Sort sensors by nodeId value
+        sorted_indices = np.argsort(nodes)[::-1]
+        
+        rows = []
+        for idx in sorted_indices:
+            coord = positions[idx]
+            rows.append((
+                f"{nodes[idx]}",   # Node ID
+                f"{coord[0]:.2f}", # X coordinate
+                f"{coord[1]:.2f}", # Y coordinate
+                f"{coord[2]:.2f}"  # Z coordinate
+            ))
+        
+        frame = ttk.Frame(self.plot_frame)
+        
+        # Create 3D visualization
+        fig = plt.Figure(figsize=(8, 6))
+        ax = fig.add_subplot(111, projection='3d')
+        
+        # Plot all nodes if available
+        optimizer = self.optimizers.get(selected_item, self.optimizer)
+        if optimizer and optimizer.nodes is not None:
+            # Large meshes are drawn with a spatially downsampled background
+            all_nodes = optimizer.nodes[downsample_nodes(optimizer.nodes, self.display_max_points)]
+            ax.scatter(all_nodes[:, 0], all_nodes[:, 1], all_nodes[:, 2],
+                      c='lightblue', marker='o', alpha=0.2, s=20,label='Available Nodes')
+        
+        # Plot selected sensors
+            ax.scatter(positions[:, 0], positions[:, 1], positions[:, 2],
+                        color='red',s=100, alpha=0.5, marker='o', label='Selected Sensors')
+
+        # Add node labels for selected sensors
+        for i, (coord, node) in enumerate(zip(positions, nodes)):
+            ax.text(coord[0], coord[1], coord[2], f' {node}',
+                   fontsize=8, ha='left', va='bottom')
+        
+        # Set labels and title
+        ax.set_xlabel('X (mm)')
+        ax.set_ylabel('Y (mm)')
+        ax.set_zlabel('Z (mm)')
+        ax.set_title(f'Sensor Placement - {selected_item}')
+        
+        # Add legend
+        ax.legend()
+        
+        # Adjust view
+        ax.view_init(elev=30, azim=45)
+        
+        # Add interaction capabilities
+        def on_click(event):
+            if event.inaxes == ax:
+                ax.view_init(elev=ax.elev, azim=ax.azim)
+                canvas.draw()
+        
+        # Create toolbar for basic matplotlib interactions
+        canvas = FigureCanvasTkAgg(fig, frame)
+        canvas.draw()
+        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        
+        # Add navigation toolbar
+        from matplotlib.backends.backend_tkagg import NavigationToolbar2Tk
+        toolbar = NavigationToolbar2Tk(canvas, frame)
+        toolbar.update()
+        
+        # Connect click event
+        canvas.mpl_connect('button_press_event', on_click)
+        
+        # Add summary information
+        summary_frame = ttk.Frame(frame)
+        summary_frame.pack(fill=tk.X, pady=5)
+        
+        summary_text = (
+            f"Method: {selected_item}\n"
+            f"Total Sensors: {len(positions)}\n"
+        )
+        
+        summary_label = ttk.Label(summary_frame, text=summary_text, justify=tk.LEFT)
+        summary_label.pack(padx=5)
+        
+        return {'frame': frame, 'rows': rows}
               
     def update_mode_selection(self, event=None):
         try:
@@ -428,4 +572,24 @@ class SensorPlacementGUI:
             
         except ValueError:
             messagebox.showerror("Error", "Please enter a valid number of modes")
-    
\ No newline at end of file
+
+    def update_sensor_count(self, event=None):
+        optimizer = self.optimizers.get("EFI")
+        if optimizer is None or "EFI" not in self.results_data:
+            return
+        try:
+            n_sensors = int(self.n_sensors.get())
+            n_nodes = len(optimizer.nodes)
+            if not 0 < n_sensors <= n_nodes:
+                messagebox.showerror("Error", f"Number of sensors must be between 1 and {n_nodes}")
+                return
+            
+            # Rerun EFI with the OSP algorithm in the background; a newer count
+            # supersedes a sweep that is still running
+            for job in self.jobs.values():
+                if job['key'] == "EFI":
+                    job['cancel'].set()
+            self.start_job("EFI", optimizer, lambda: optimizer.results_for_count(n_sensors))
+                
+        except ValueError:
+            messagebox.showerror("Error", "Please enter a valid number of sensors")
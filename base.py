@@ -6,36 +6,105 @@ elif platform.system() == 'Windows':
     import matplotlib
     matplotlib.use('TkAgg')
 
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from mpl_toolkits.mplot3d import Axes3D
-from scipy.linalg import eigh
+from efi import (leverage, elimination_order, forward_selection, exchange_refinement, candidate_pool,
+                 driving_point_residue, CHUNK_BYTES)
+from cache import DatasetCache
+from ingest import read_columns
+from session import DatasetSession
+from plotting import downsample_nodes, MAX_PLOT_POINTS
+from export import ResultExporter, matrix_key
+from instrument import span, timed
+
+# Node-only plots of this process by (output path, dpi, point limit, node hash):
+# False while rendering, True once saved
+_plotted = {}
+_plotted_lock = threading.Lock()
+
+class OptimizationCancelled(Exception):
+    """Raised from a progress callback to stop a running optimisation"""
+
 
 class SensorOptimizer:
+    MODE_COLUMN = 'Directional Deformation (mm)'
+
     def __init__(self, xyz_file, mode_files, target_sensors, modal_frequencies=np.array([
     1.4407, 2.2387, 2.3951, 2.9588, 3.5732, 4.1455,
     4.8339, 5.1074, 5.1398, 5.1825, 5.3577, 7.1458,
     7.3409, 7.4890, 8.8081, 9.6121, 9.9351, 10.022,
     10.183, 11.182
-])):
+]), cache_dir='.osp_cache', session=None):
         print("Initializing SensorOptimizer...")
         self.xyz_file = xyz_file
         self.mode_files = mode_files
         self.target_sensors = target_sensors
         self.modal_frequencies = modal_frequencies if modal_frequencies is not None else np.ones(len(mode_files))
+        # modal_frequencies holds one value per mode (the first n_modes are used);
+        # set to True to pass exactly one value per mode matrix column instead
+        self.per_column_frequencies = False
         self.nodes = None
         self.Main_Mat = None
         self.POS = None
         self.COO = None
         self.Ed = None
+        # EFI elimination mode: 'batch' (fast approximation) or 'sequential' (exact)
+        self.efi_mode = 'batch'
+        self.elimination = None
+        # Greedy forward selection history (selection order, gains, log-determinants)
+        self.forward = None
+        # Candidate pool from screen_candidates; the GA and exchange refinement
+        # only search these node indices (None searches every node)
+        self.candidates = None
+        self.candidate_scores = None
+        # Per-node DPR of Main_Mat and the frequency layout and values it was computed with
+        self._dpr = None
+        # On-disk cache of parsed input files (None disables caching)
+        self.cache = DatasetCache(cache_dir) if cache_dir else None
+        # In-memory store of parsed inputs; pass a shared DatasetSession to
+        # reuse loaded data across optimisers
+        self.session = session if session is not None else DatasetSession()
+        # Working memory per row chunk when EFI scans the mode matrix
+        self.chunk_bytes = CHUNK_BYTES
+        # Worker processes used to parse mode files (None uses every core)
+        self.ingest_workers = None
+        # Called as progress_callback(stage, fraction); raising
+        # OptimizationCancelled from it stops the run
+        self.progress_callback = None
+        # Node plots: 'background' renders on a worker thread so results are
+        # returned without waiting, 'sync' renders in place, 'off' skips them
+        self.plot_mode = 'background'
+        self.plot_dpi = 300
+        # Background nodes drawn per plot (None draws every node)
+        self.plot_max_points = MAX_PLOT_POINTS
+        self._plot_executor = None
+        self.plot_jobs = []
+        # Writes result tables and the mode matrix (set asynchronous=True to
+        # return results before the files are written)
+        self.exporter = ResultExporter()
+
+    def report_progress(self, stage, fraction):
+        if self.progress_callback is not None:
+            self.progress_callback(stage, fraction)
   
     def read_coordinates(self):
             print("\nReading coordinates file...")
             try:
-                df = pd.read_excel(self.xyz_file)
                 coord_columns = ['X Location (mm)', 'Y Location (mm)', 'Z Location (mm)']
-                self.nodes = df[coord_columns].values
+                loader = lambda: pd.read_excel(self.xyz_file)[coord_columns].values
+                with span('ingest'), self.session.lock:
+                    self.nodes = self.session.get_nodes(self.xyz_file)
+                    if self.nodes is None:
+                        if self.cache is not None:
+                            self.nodes = self.cache.load(self.xyz_file, coord_columns, loader)
+                        else:
+                            self.nodes = loader()
+                        self.session.put_nodes(self.xyz_file, self.nodes)
                 print(f"Successfully read {len(self.nodes)} nodes")
                 return self.nodes
                 
@@ -45,35 +114,135 @@ class SensorOptimizer:
         
     def prepare_displacement_data(self):
         print("\nPreparing displacement data...")
-        mode_data = []
-        for i, file in enumerate(self.mode_files):
-            try:
-                print(f"Reading mode file {i+1}/{len(self.mode_files)}: {file}")
-                df = pd.read_excel(file)
-                data = df['Directional Deformation (mm)'].values
-                mode_data.append(data)
-            except Exception as e:
-                print(f"Error reading mode file {file}: {str(e)}")
-                raise
-        
-        self.Main_Mat = np.column_stack(mode_data)
-        # Normalize the displacement data
-        for i in range(self.Main_Mat.shape[1]):
-            self.Main_Mat[:, i] = self.Main_Mat[:, i] / np.max(np.abs(self.Main_Mat[:, i]))
+        # Only mode columns the store has not loaded yet are read
+        with span('ingest'), self.session.lock:
+            self.Main_Mat = self.session.modes.get(self.mode_files, self._load_mode_columns)
             
         print("Shape of Main_Mat:", self.Main_Mat.shape)
+        return self.use_data(self.nodes, self.Main_Mat)
+
+    def use_data(self, nodes, mode_matrix):
+        """
+        Use already loaded coordinates and normalised mode matrix.
+        
+        Args:
+            nodes (np.ndarray): Node coordinates (n_nodes x 3)
+            mode_matrix (np.ndarray): Normalised mode matrix (n_nodes x n_columns)
+        
+        Returns:
+            np.ndarray: The mode matrix
+        """
+        self.nodes = nodes
+        self.Main_Mat = mode_matrix
+        self.elimination = None
+        self.forward = None
+        self.candidates = None
+        self.candidate_scores = None
+        self._dpr = None
         self.POS = np.array([f"{i+1}" for i in range(len(self.nodes))])
         return self.Main_Mat
 
+    def _load_mode_columns(self, mode_files):
+        """Load and normalise the displacement columns of the given mode files"""
+        print(f"Loading {len(mode_files)} of {len(self.mode_files)} mode files")
+        if self.cache is not None:
+            # Raw columns are cached per file version, so any mode selection reuses them
+            file_keys = [self.cache.file_key(file, self.MODE_COLUMN) for file in mode_files]
+            return self._build_main_mat(mode_files, file_keys)
+        return self._build_main_mat(mode_files)
+
+    def _build_main_mat(self, mode_files, file_keys=None):
+        Main_Mat = np.empty((len(self.nodes), len(mode_files)))
+        
+        # Take what the cache has, parse the rest concurrently
+        missing = []
+        for i, file in enumerate(mode_files):
+            cached = self.cache.lookup(file, file_keys[i]) if file_keys else None
+            if cached is not None:
+                Main_Mat[:, i] = cached
+            else:
+                missing.append(i)
+        with span('read'):
+            read_columns([mode_files[i] for i in missing], self.MODE_COLUMN,
+                         out=Main_Mat, out_columns=missing, max_workers=self.ingest_workers)
+        if file_keys:
+            for i in missing:
+                self.cache.put(mode_files[i], file_keys[i], Main_Mat[:, i])
+        
+        return self.normalise_columns(Main_Mat)
+
+    @staticmethod
+    def normalise_columns(Main_Mat):
+        """Scale every displacement column to a peak magnitude of 1, in place"""
+        with span('normalise'):
+            Main_Mat /= np.max(np.abs(Main_Mat), axis=0)
+        return Main_Mat
+
     def plot_nodes(self, nodes, title="Node Positions", selected_indices=None):
+        """
+        Save a 3D plot of the nodes, honouring plot_mode.
+
+        Args:
+            nodes (np.ndarray): Node coordinates
+            title (str): Plot title, also used for the PNG file name
+            selected_indices (np.ndarray): Indices of the selected sensors
+
+        Returns:
+            Future: Pending plot in 'background' mode, otherwise None (also when
+                the same nodes are already saved to this file at this DPI)
+        """
+        if self.plot_mode == 'off':
+            return None
+        if selected_indices is not None:
+            selected_indices = np.array(selected_indices)
+        else:
+            # Every method plots the same initial nodes; concurrent jobs on one
+            # dataset would write the same file at once, so it is rendered once
+            # (a deleted file, another working directory or DPI plots it again)
+            key = self._plot_key(nodes, title)
+            with _plotted_lock:
+                if key in _plotted and (not _plotted[key] or os.path.exists(key[0])):
+                    return None
+                _plotted[key] = False
+        if self.plot_mode == 'background':
+            if self._plot_executor is None:
+                self._plot_executor = ThreadPoolExecutor(max_workers=1)
+            job = self._plot_executor.submit(self._render_nodes, nodes, title, selected_indices)
+            self.plot_jobs.append(job)
+            return job
+        self._render_nodes(nodes, title, selected_indices)
+        return None
+
+    def _plot_file(self, title):
+        return f"{title.replace(' ', '_')}.png"
+
+    def _plot_key(self, nodes, title):
+        return (os.path.abspath(self._plot_file(title)), self.plot_dpi, self.plot_max_points, matrix_key(nodes))
+
+    def wait_for_plots(self):
+        """
+        Wait for the background plots submitted so far.
+
+        Returns:
+            list: File names of the saved plots
+        """
+        jobs, self.plot_jobs = self.plot_jobs, []
+        return [job.result() for job in jobs]
+
+    @timed('plotting')
+    def _render_nodes(self, nodes, title, selected_indices):
         print(f"\nPlotting {title}...")
         try:
-            fig = plt.figure(figsize=(12, 10))
+            # Figure/Agg instead of pyplot so plots can be made off the main thread
+            fig = Figure(figsize=(12, 10))
+            FigureCanvasAgg(fig)
             ax = fig.add_subplot(111, projection='3d')
             
-            # Plot all nodes in light blue
-            ax.scatter(nodes[:, 0], nodes[:, 1], nodes[:, 2], 
-                    c='lightblue', marker='o', alpha=0.5, label='All Nodes')
+            # Plot the nodes in light blue, spatially downsampled on large meshes
+            shown = nodes[downsample_nodes(nodes, self.plot_max_points)]
+            label = 'All Nodes' if len(shown) == len(nodes) else f'Nodes ({len(shown)} of {len(nodes)} shown)'
+            ax.scatter(shown[:, 0], shown[:, 1], shown[:, 2], 
+                    c='lightblue', marker='o', alpha=0.5, label=label)
             
             # If we have selected nodes, plot them in red
             if selected_indices is not None:
@@ -94,52 +263,139 @@ class SensorOptimizer:
             if selected_indices is not None:
                 ax.legend()
             
-            plt.savefig(f"{title.replace(' ', '_')}.png", dpi=300, bbox_inches='tight')
-            print(f"Plot saved as {title.replace(' ', '_')}.png")
-            plt.close()
+            filename = self._plot_file(title)
+            fig.savefig(filename, dpi=self.plot_dpi, bbox_inches='tight')
+            print(f"Plot saved as {filename}")
+            if selected_indices is None:
+                with _plotted_lock:
+                    _plotted[self._plot_key(nodes, title)] = True
+            return filename
         except Exception as e:
+            if selected_indices is None:
+                with _plotted_lock:
+                    _plotted.pop(self._plot_key(nodes, title), None)
             print(f"Error plotting nodes: {str(e)}")
             raise
 
-    def effective_independence(self):
+    @timed('efi')
+    def effective_independence(self, mode=None):
+        mode = mode or self.efi_mode
+        if mode == 'sequential':
+            print("\nRunning effective independence method (sequential)...")
+            return self.select_sensors(self.target_sensors)
+        
         print("\nRunning effective independence method...")
-        M_Mat = self.Main_Mat.copy()
-        n_dofs = M_Mat.shape[0]
+        n_dofs = self.Main_Mat.shape[0]
         n_remove = n_dofs - self.target_sensors
         
-        # Calculate initial FIM
-        fim = M_Mat @ M_Mat.T
-        eigenvals, eigenvects = eigh(fim)
+        # Calculate initial contribution of each DOF from the mode-space FIM
+        Ed = leverage(self.Main_Mat, chunk_bytes=self.chunk_bytes)
         
-        # Track indices of remaining nodes
+        # Removed nodes are masked out instead of deleted from a copy of the
+        # matrix, so the mode matrix is only ever read in chunks
+        active = np.ones(n_dofs, dtype=bool)
         remaining_indices = np.arange(n_dofs)
         
         # Remove nodes in batches for better performance
         batch_size = max(100, n_remove // 10)
         
         while len(remaining_indices) > self.target_sensors:
-            # Calculate contribution of each DOF
-            Ed = np.sum(eigenvects**2, axis=1)
-            
-            # Get indices of nodes to remove in this batch
-            n_to_remove = min(batch_size, len(remaining_indices) - self.target_sensors)
-            remove_indices = np.argsort(Ed)[:n_to_remove]
-            
-            # Update remaining indices and matrices
-            remaining_indices = np.delete(remaining_indices, remove_indices)
-            M_Mat = np.delete(M_Mat, remove_indices, axis=0)
-            
-            # Recalculate FIM and eigenvectors
-            fim = M_Mat @ M_Mat.T
-            eigenvals, eigenvects = eigh(fim)
+            with span('elimination_batch'):
+                # Get indices of nodes to remove in this batch
+                n_to_remove = min(batch_size, len(remaining_indices) - self.target_sensors)
+                remove_indices = np.argsort(Ed)[:n_to_remove]
+                
+                # Update the active mask and remaining indices
+                active[remaining_indices[remove_indices]] = False
+                remaining_indices = np.flatnonzero(active)
+                
+                # Recalculate contributions of the remaining DOFs
+                Ed = leverage(self.Main_Mat, rows=remaining_indices, chunk_bytes=self.chunk_bytes)
             
             print(f"Remaining nodes: {len(remaining_indices)}")
+            self.report_progress('EFI', 1 - (len(remaining_indices) - self.target_sensors) / n_remove)
         
-        # Calculate final contributions
-        self.Ed = np.sum(eigenvects**2, axis=1)
+        # Store final contributions
+        self.Ed = Ed
         
         return remaining_indices, self.Ed
     
+    def compute_elimination_order(self, min_sensors=1):
+        """
+        Run the exact EFI elimination once and keep its full history.
+        
+        Args:
+            min_sensors (int): Smallest sensor count the history must cover
+        
+        Returns:
+            dict: Removal order, Ed at removal and FIM log-determinant per sensor count
+        """
+        print("\nComputing EFI elimination order...")
+        with span('elimination'):
+            self.elimination = elimination_order(
+                self.Main_Mat, min_sensors, progress=lambda fraction: self.report_progress('EFI', fraction),
+                chunk_bytes=self.chunk_bytes)
+        self.elimination['min_sensors'] = min_sensors
+        return self.elimination
+
+    def select_sensors(self, n_sensors):
+        """
+        Select the EFI sensor set for any sensor count from the stored elimination order.
+        
+        The elimination is only run when no order is stored yet or when it
+        does not reach down to n_sensors.
+        
+        Args:
+            n_sensors (int): Number of sensors to select
+        
+        Returns:
+            tuple: (selected indices, contribution measures)
+        """
+        if self.elimination is None or n_sensors < self.elimination['min_sensors']:
+            self.compute_elimination_order()
+        selected_indices = self.elimination['order'][-n_sensors:]
+        self.Ed = leverage(self.Main_Mat[selected_indices])
+        return selected_indices, self.Ed
+
+    def fisher_determinant_curve(self):
+        """
+        Fisher-determinant-vs-sensor-count curve of the EFI elimination.
+        
+        Returns:
+            tuple: (sensor counts, log-determinant of the FIM for each count)
+        """
+        if self.elimination is None:
+            self.compute_elimination_order()
+        logdet = self.elimination['logdet']
+        counts = np.arange(self.elimination['min_sensors'], len(logdet))
+        return counts, logdet[counts]
+
+    def results_for_count(self, n_sensors):
+        """
+        Build the EFI results for another sensor count.
+        
+        The count is answered with the same algorithm as optimize_positions
+        (efi_mode), so a result does not change method with the count. In
+        'sequential' mode the stored elimination order is reused; in 'batch'
+        mode the batch elimination is rerun, which is cheap.
+        
+        Args:
+            n_sensors (int): Number of sensors to select
+        
+        Returns:
+            dict: Results containing selected positions, coordinates, and contributions
+        """
+        self.target_sensors = n_sensors
+        if self.efi_mode == 'sequential':
+            selected_indices, contributions = self.select_sensors(n_sensors)
+        else:
+            selected_indices, contributions = self.effective_independence(mode='batch')
+        return {
+            'POS': self.POS[selected_indices],
+            'COO': self.nodes[selected_indices],
+            'Ed': contributions
+        }
+
     def optimize_positions(self):
         print("\nStarting optimization process...")
         try:
@@ -147,11 +403,14 @@ class SensorOptimizer:
             self.read_coordinates()
             self.prepare_displacement_data()
             
+            self.report_progress('EFI', 0.0)
+            
             # Plot initial positions
             self.plot_nodes(self.nodes, "Initial Node Positions")
             
             # Run optimization
             selected_indices, contributions = self.effective_independence()
+            self.report_progress('EFI', 1.0)
             
             # Store results
             results = {
@@ -177,22 +436,65 @@ class SensorOptimizer:
             print(f"Error during optimization: {str(e)}")
             raise
 
-    def calculate_dpr(self, mode_shapes):
+    def calculate_dpr(self, mode_shapes=None):
         """
         Calculate Driving Point Residue for each DOF.
         
+        modal_frequencies holds one value per mode, or per mode matrix
+        column when per_column_frequencies is set. The DPR of Main_Mat is a
+        fixed per-node quantity, so it is computed once and cached until the
+        data or the frequencies change.
+        
         Args:
-            mode_shapes (np.ndarray): Mode shape matrix
+            mode_shapes (np.ndarray): Mode shape matrix (defaults to Main_Mat)
         
         Returns:
             np.ndarray: DPR values for each DOF
         """
-        dpr = np.zeros(mode_shapes.shape[0])
-        for i in range(mode_shapes.shape[1]):
-            # Square of mode shape amplitudes divided by modal frequency
-            dpr += mode_shapes[:, i]**2 / self.modal_frequencies[i]
-        return dpr
+        per_column = self.per_column_frequencies
+        if mode_shapes is not None and mode_shapes is not self.Main_Mat:
+            return driving_point_residue(mode_shapes, self.modal_frequencies, self.chunk_bytes, per_column)
+        frequencies = np.asarray(self.modal_frequencies, dtype=float)
+        if self._dpr is None or self._dpr[0] != per_column or not np.array_equal(self._dpr[1], frequencies):
+            dpr = driving_point_residue(self.Main_Mat, frequencies, self.chunk_bytes, per_column)
+            self._dpr = (per_column, frequencies.copy(), dpr)
+        return self._dpr[2]
+
+    @timed('screening')
+    def screen_candidates(self, top=None, threshold=None, method='EFI'):
+        """
+        Keep the most informative nodes as the candidate pool of later searches.
+        
+        Nodes are scored once by their leverage, weighted by their
+        normalised DPR for 'EFI-DPR' (see efi.candidate_pool). Nodes near
+        modal nodes score close to zero and are dropped, so the GA and
+        exchange refinement do not spend their evaluations on them.
+        
+        Args:
+            top (int): Number of nodes to keep, shared evenly between the mode directions
+                and topped up by score (fewer only when fewer pass the threshold)
+            threshold (float): Keep nodes scoring at least this fraction of the best node
+            method (str): 'EFI' or 'EFI-DPR'
+        
+        Returns:
+            np.ndarray: Sorted candidate node indices
+        """
+        print("\nScreening candidate nodes...")
+        weights = None
+        if method == 'EFI-DPR':
+            dpr = self.calculate_dpr()
+            weights = dpr / np.max(dpr)
+        candidates, scores = candidate_pool(self.Main_Mat, top, threshold, weights, chunk_bytes=self.chunk_bytes)
+        if len(candidates) < self.target_sensors:
+            print(f"Only {len(candidates)} nodes pass the screening, keeping the best {self.target_sensors}")
+            candidates = np.sort(np.argsort(scores)[-self.target_sensors:])
+        
+        self.candidates = candidates
+        self.candidate_scores = scores / np.max(scores)
+        print(f"Kept {len(candidates)} of {len(scores)} nodes as candidates")
+        return self.candidates
 
+    @timed('efi_dpr')
     def effective_independence_dpr(self):
         """
         Implement EFI-DPR method for sensor placement optimization.
@@ -201,24 +503,20 @@ class SensorOptimizer:
             tuple: (selected indices, contribution measures)
         """
         print("\nRunning EFI-DPR method...")
-        M_Mat = self.Main_Mat.copy()
+        M_Mat = self.Main_Mat
         n_dofs = M_Mat.shape[0]
         
         # Calculate initial DPR
-        dpr = self.calculate_dpr(M_Mat)
+        dpr = self.calculate_dpr()
         
         # Normalize DPR values
         dpr_normalized = dpr / np.max(dpr)
         
-        # Calculate initial FIM
-        fim = M_Mat @ M_Mat.T
-        eigenvals, eigenvects = eigh(fim)
-        
         # Track indices of remaining nodes
         remaining_indices = np.arange(n_dofs)
         
         # Calculate initial EFI contribution
-        Ed = np.sum(eigenvects**2, axis=1)
+        Ed = leverage(M_Mat, chunk_bytes=self.chunk_bytes)
         Ed_normalized = Ed / np.max(Ed)
         
         # Calculate combined metric for all nodes
@@ -229,14 +527,85 @@ class SensorOptimizer:
         
         # Calculate final contributions for selected nodes
         selected_M_Mat = M_Mat[selected_indices]
-        selected_fim = selected_M_Mat @ selected_M_Mat.T
-        _, selected_eigenvects = eigh(selected_fim)
         
-        self.Ed = np.sum(selected_eigenvects**2, axis=1) * dpr_normalized[selected_indices]
+        self.Ed = leverage(selected_M_Mat) * dpr_normalized[selected_indices]
         
         print(f"Selected {len(selected_indices)} sensor positions")
         return selected_indices, self.Ed
 
+    @timed('forward')
+    def select_forward(self, n_sensors=None):
+        """
+        Select sensors by greedy D-optimal forward selection.
+        
+        Sensors are added one at a time, each maximising the FIM
+        log-determinant gain, which costs O(n_dofs * n_modes * n_sensors)
+        instead of eliminating almost every node when few sensors are
+        wanted. The selection order is stored, so fewer sensors are
+        answered from its prefix.
+        
+        Args:
+            n_sensors (int): Number of sensors (defaults to target_sensors)
+        
+        Returns:
+            tuple: (selected indices, contribution measures)
+        """
+        n_sensors = self.target_sensors if n_sensors is None else n_sensors
+        if self.forward is None or n_sensors > len(self.forward['order']):
+            print("\nRunning greedy forward selection...")
+            self.forward = forward_selection(
+                self.Main_Mat, n_sensors, chunk_bytes=self.chunk_bytes,
+                progress=lambda fraction: self.report_progress('Forward', fraction))
+        selected_indices = self.forward['order'][:n_sensors]
+        self.Ed = leverage(self.Main_Mat[selected_indices])
+        return selected_indices, self.Ed
+
+    def optimize_positions_forward(self):
+        """
+        Execute the complete optimization process using greedy forward selection.
+        
+        Returns:
+            dict: Results containing selected positions, coordinates, and contributions
+        """
+        print("\nStarting forward selection optimization process...")
+        try:
+            # Read and process input data
+            self.read_coordinates()
+            self.prepare_displacement_data()
+            
+            self.report_progress('Forward', 0.0)
+            
+            # Plot initial positions
+            self.plot_nodes(self.nodes, "Initial Node Positions")
+            
+            # Run greedy forward selection
+            selected_indices, contributions = self.select_forward()
+            self.report_progress('Forward', 1.0)
+            
+            # Store results
+            results = {
+                'POS': self.POS[selected_indices],
+                'COO': self.nodes[selected_indices],
+                'Ed': contributions
+            }
+            
+            # Plot final positions with both selected and unselected nodes
+            self.plot_nodes(self.nodes, "Selected Sensor Positions (Forward)", selected_indices)
+            
+            # Save results with forward selection suffix
+            self.save_results(results, suffix='_Forward')
+            
+            print("\nForward selection optimization completed successfully!")
+            print("\nSelected sensor positions (forward selection):")
+            for i, (pos, coord) in enumerate(zip(results['POS'], results['COO']), 1):
+                print(f"Sensor {i}: Node {pos} at coordinates ({coord[0]:.2f}, {coord[1]:.2f}, {coord[2]:.2f})")
+            
+            return results
+            
+        except Exception as e:
+            print(f"Error during forward selection optimization: {str(e)}")
+            raise
+
     def optimize_positions_dpr(self):
         """
         Execute the complete optimization process using EFI-DPR method.
@@ -250,11 +619,14 @@ class SensorOptimizer:
             self.read_coordinates()
             self.prepare_displacement_data()
             
+            self.report_progress('EFI-DPR', 0.0)
+            
             # Plot initial positions
             self.plot_nodes(self.nodes, "Initial Node Positions")
             
             # Run optimization with EFI-DPR
             selected_indices, contributions = self.effective_independence_dpr()
+            self.report_progress('EFI-DPR', 1.0)
             
             # Store results
             results = {
@@ -279,10 +651,67 @@ class SensorOptimizer:
         except Exception as e:
             print(f"Error during EFI-DPR optimization: {str(e)}")
             raise
+
+
+    @timed('refine')
+    def refine_results(self, results, max_iterations=1000, time_limit=None, neighbourhood=None, candidates=None):
+        """
+        Improve a result by swapping sensors (Fedorov exchange).
+        
+        Every (selected, unselected) swap is scored with a rank-two update
+        of the FIM log-determinant and the best improving swap is applied
+        until none is left. The criterion is the D-optimal one for every
+        method, so DPR weighting is not kept by the refinement.
+        
+        Args:
+            results (dict): Results from any optimize_positions* method
+            max_iterations (int): Maximum number of swaps
+            time_limit (float): Wall-clock limit in seconds (None for no limit)
+            neighbourhood (int): Only swap a sensor with one of its
+                neighbourhood nearest nodes (None considers every node)
+            candidates (np.ndarray): Node indices allowed to enter the set
+                (defaults to the screened candidates, see screen_candidates)
+        
+        Returns:
+            dict: Refined results; 'refinement' holds the initial and final
+                log-determinant, the applied swaps and the stop reason
+        """
+        index_of = {pos: i for i, pos in enumerate(self.POS)}
+        selected = np.array([index_of[pos] for pos in results['POS']], dtype=np.int64)
+
+        neighbours = None
+        if neighbourhood:
+            from scipy.spatial import cKDTree
+            tree = cKDTree(self.nodes)
+            k = min(len(self.nodes), neighbourhood + 1)
+
+            def neighbours(indices):
+                return tree.query(self.nodes[indices], k=k)[1]
+
+        print(f"\nRefining {len(selected)} sensor positions by exchange...")
+        if candidates is None:
+            candidates = self.candidates
+        info = exchange_refinement(self.Main_Mat, selected, candidates=candidates, neighbours=neighbours,
+                                   max_iterations=max_iterations, time_limit=time_limit,
+                                   chunk_bytes=self.chunk_bytes)
+        selected = info['selected']
+        print(f"Applied {len(info['swaps'])} swaps ({info['stop_reason']}), "
+              f"FIM log-determinant {info['initial_logdet']:.4f} -> {info['logdet']:.4f}")
+        self.Ed = leverage(self.Main_Mat[selected])
+        return {
+            'POS': self.POS[selected],
+            'COO': self.nodes[selected],
+            'Ed': self.Ed,
+            'refinement': info
+        }
   
+    @timed('saving')
     def save_results(self, results, suffix=''):
             """
-            Save optimization results to Excel files.
+            Save optimization results through the exporter.
+            
+            The results table is written per method; the mode shape matrix
+            is the same for every method and is written once per content.
             
             Args:
                 results (dict): Results to save
@@ -291,23 +720,14 @@ class SensorOptimizer:
             print("\nSaving results...")
             try:
                 # Save sensor positions and contributions
-                result_df = pd.DataFrame({
-                    'Node': results['POS'],
-                    'Contribution': results['Ed'],
-                    'X (mm)': results['COO'][:, 0],
-                    'Y (mm)': results['COO'][:, 1],
-                    'Z (mm)': results['COO'][:, 2]
-                })
-                result_filename = f'resultBWPt{suffix}.xlsx'
-                result_df.to_excel(result_filename, index=False)
-                print(f"Saved results to {result_filename}")
+                self.exporter.export_results(results, f'resultBWPt{suffix}')
                 
                 # Save reduced mode shape matrix
-                mmat_filename = f'MMatBWPt{suffix}.xlsx'
-                pd.DataFrame(self.Main_Mat).to_excel(mmat_filename, index=False)
-                print(f"Saved mode shape matrix to {mmat_filename}")
+                columns = [os.path.splitext(os.path.basename(file))[0] for file in self.mode_files]
+                if len(set(columns)) != len(columns):
+                    columns = None
+                self.exporter.export_matrix(self.Main_Mat, 'MMatBWPt', columns)
                 
             except Exception as e:
                 print(f"Error saving results: {str(e)}")
                 raise
-
@@ -0,0 +1,292 @@
+"""
+Headless batch runner for sensor placement sweeps.
+
+Usage:
+    python batch.py jobs.json [--workers N] [--output results.csv]
+
+The job file is JSON:
+
+    {
+        "output": "batch_results.csv",
+        "workers": 8,
+        "datasets": {
+            "beam": {"xyz": "beam/XYZ.xlsx", "mode_dir": "beam", "n_modes": 6},
+            "plate": {"xyz": "plate/XYZ.xlsx", "modes": ["plate/DEFX1.xlsx", "..."],
+                      "frequencies": [1.2, 3.4]}
+        },
+        "jobs": [
+            {"dataset": "beam", "methods": ["EFI", "EFI-DPR"], "sensors": [5, 10, 20]},
+            {"dataset": "plate", "methods": ["GA-EFI"], "sensors": [10], "ga_params": {"seed": 1},
+             "screening": {"top": 2000}}
+        ]
+    }
+
+Each dataset is loaded once in the main process and placed in shared
+memory; worker processes map it read-only. "EFI" is the batch
+elimination of optimize_positions, rerun per sensor count. "EFI-exact" is
+the exact one-node-at-a-time elimination (quadratic in the node count),
+whose single elimination order answers every count, as does one Forward
+run. EFI-DPR runs once per count and GA jobs run one task per sensor
+count. An optional "screening" entry (screen_candidates keyword
+arguments) restricts the GA of a job to a candidate pool of the most
+informative nodes. "frequencies" lists one modal frequency per mode; a
+longer list is cut to the modes in use. Every selected sensor becomes one
+row of the output table.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+import numpy as np
+from optimizer import SensorOptimizer
+from efi import log_det_batch
+from export import ResultExporter, WRITERS
+
+METHODS = ('EFI', 'EFI-exact', 'EFI-DPR', 'Forward', 'GA-EFI', 'GA-EFI-DPR')
+
+# Per-process views of the shared datasets, set up by _attach
+_datasets = {}
+
+
+def mode_files_for(directory, n_modes):
+    """
+    Find the DEFX/DEFY/DEFZ files of the first n_modes modes in a directory.
+
+    Args:
+        directory (str): Directory holding the mode files
+        n_modes (int): Number of modes to use
+
+    Returns:
+        list: Mode files ordered X, Y, Z per mode
+    """
+    found = {}
+    for name in os.listdir(directory):
+        match = re.search(r'DEF([XYZ])(\d+)(?!\d)', name)
+        if match and name.endswith('.xlsx'):
+            found[(int(match.group(2)), match.group(1))] = os.path.join(directory, name)
+    files = []
+    for mode in range(1, n_modes + 1):
+        for direction in 'XYZ':
+            if (mode, direction) not in found:
+                raise FileNotFoundError(f"No DEF{direction}{mode} file in {directory}")
+            files.append(found[(mode, direction)])
+    return files
+
+
+def load_dataset(spec, cache_dir='.osp_cache'):
+    """
+    Read the coordinates and normalised mode matrix of a dataset.
+
+    Args:
+        spec (dict): 'xyz' and either 'modes' or 'mode_dir' with 'n_modes'
+        cache_dir (str): Parsed-input cache directory
+
+    Returns:
+        tuple: (nodes, mode matrix, modal frequencies or None)
+    """
+    if 'modes' in spec:
+        mode_files = list(spec['modes'])
+    else:
+        mode_files = mode_files_for(spec['mode_dir'], int(spec['n_modes']))
+    optimizer = SensorOptimizer(spec['xyz'], mode_files, 1, cache_dir=cache_dir)
+    optimizer.read_coordinates()
+    optimizer.prepare_displacement_data()
+    frequencies = spec.get('frequencies')
+    return optimizer.nodes, optimizer.Main_Mat, None if frequencies is None else np.asarray(frequencies, dtype=float)
+
+
+def _attach(layout):
+    """Pool initializer: map every shared dataset without copying it"""
+    for name, (arrays, frequencies) in layout.items():
+        views = {}
+        for key, (block_name, shape, dtype) in arrays.items():
+            block = shared_memory.SharedMemory(name=block_name)
+            view = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+            view.flags.writeable = False
+            views[key] = view
+            views[f'{key}_block'] = block
+        views['frequencies'] = frequencies
+        _datasets[name] = views
+
+
+def _optimizer_for(dataset, n_sensors, ga_params, screening=None):
+    data = _datasets[dataset]
+    kwargs = {} if data['frequencies'] is None else {'modal_frequencies': data['frequencies']}
+    optimizer = SensorOptimizer(None, [], n_sensors, cache_dir=None, **kwargs)
+    optimizer.plot_mode = 'off'
+    optimizer.ga_params = dict(ga_params or {})
+    optimizer.use_data(data['nodes'], data['modes'])
+    if screening:
+        optimizer.screen_candidates(**screening)
+    return optimizer
+
+
+def _run_task(task):
+    """Run one method on one dataset and return its result rows"""
+    dataset, method, counts, ga_params, screening = task
+    start = time.perf_counter()
+    optimizer = _optimizer_for(dataset, max(counts), ga_params, screening if method.startswith('GA-') else None)
+    selections = []
+    if method == 'EFI':
+        for n_sensors in counts:
+            optimizer.target_sensors = n_sensors
+            selections.append((n_sensors,) + optimizer.effective_independence(mode='batch') + ('',))
+    elif method == 'EFI-exact':
+        # One elimination answers every sensor count
+        optimizer.compute_elimination_order(min(counts))
+        for n_sensors in counts:
+            selections.append((n_sensors,) + optimizer.select_sensors(n_sensors) + ('',))
+    elif method == 'Forward':
+        # The selection for fewer sensors is a prefix of the largest one
+        optimizer.select_forward(max(counts))
+        for n_sensors in counts:
+            selections.append((n_sensors,) + optimizer.select_forward(n_sensors) + ('',))
+    elif method == 'EFI-DPR':
+        for n_sensors in counts:
+            optimizer.target_sensors = n_sensors
+            selections.append((n_sensors,) + optimizer.effective_independence_dpr() + ('',))
+    else:
+        n_sensors, = counts
+        indices, contributions = optimizer.genetic_optimization(method[len('GA-'):])
+        selections.append((n_sensors, indices, contributions, optimizer.ga_report['stop_reason']))
+    elapsed = time.perf_counter() - start
+
+    rows = []
+    for n_sensors, indices, contributions, stop_reason in selections:
+        indices = np.asarray(indices, dtype=np.intp)
+        logdet = float(log_det_batch(optimizer.Main_Mat[indices][None])[0])
+        for rank, (index, contribution) in enumerate(zip(indices, contributions), 1):
+            coord = optimizer.nodes[index]
+            rows.append({
+                'dataset': dataset,
+                'method': method,
+                'n_sensors': n_sensors,
+                'rank': rank,
+                'node': int(optimizer.POS[index]),
+                'contribution': float(contribution),
+                'X (mm)': coord[0],
+                'Y (mm)': coord[1],
+                'Z (mm)': coord[2],
+                'fisher_logdet': logdet,
+                'stop_reason': stop_reason,
+                'elapsed': elapsed
+            })
+    return rows
+
+
+def build_tasks(jobs):
+    """
+    Expand the job list into pool tasks.
+
+    Args:
+        jobs (list): Job entries with 'dataset', 'methods', 'sensors' and optional
+            'ga_params' and 'screening'
+
+    Returns:
+        list: (dataset, method, sensor counts, GA parameters, screening) tuples
+    """
+    tasks = []
+    for job in jobs:
+        counts = sorted({int(n) for n in job['sensors']})
+        if not counts or counts[0] < 1:
+            raise ValueError(f"Sensor counts of dataset '{job['dataset']}' must be at least 1, got {job['sensors']}")
+        for method in job['methods']:
+            if method not in METHODS:
+                raise ValueError(f"Unknown method '{method}', expected one of {', '.join(METHODS)}")
+            if method.startswith('GA-'):
+                tasks.extend((job['dataset'], method, [n], job.get('ga_params'), job.get('screening'))
+                             for n in counts)
+            else:
+                tasks.append((job['dataset'], method, counts, job.get('ga_params'), job.get('screening')))
+    return tasks
+
+
+def run_batch(config, workers=None, output=None):
+    """
+    Run every job of a job file and write the consolidated results table.
+
+    Args:
+        config (dict): Parsed job file
+        workers (int): Worker processes (defaults to config 'workers', then the CPU count)
+        output (str): Output table path (defaults to config 'output')
+
+    Returns:
+        tuple: (output path, number of failed tasks)
+    """
+    tasks = build_tasks(config['jobs'])
+    used = sorted({task[0] for task in tasks})
+    missing = [name for name in used if name not in config['datasets']]
+    if missing:
+        raise KeyError(f"Undefined datasets: {', '.join(missing)}")
+    workers = workers or config.get('workers') or os.cpu_count() or 1
+    output = output or config.get('output', 'batch_results.csv')
+    cache_dir = config.get('cache_dir', '.osp_cache')
+
+    blocks = []
+    layout = {}
+    try:
+        # Load each dataset once and share it with every worker
+        for name in used:
+            nodes, modes, frequencies = load_dataset(config['datasets'][name], cache_dir)
+            arrays = {}
+            for key, array in (('nodes', nodes), ('modes', modes)):
+                # Copied straight into the block; store views need no contiguous copy first
+                array = np.asarray(array)
+                block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                blocks.append(block)
+                np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+                arrays[key] = (block.name, array.shape, array.dtype)
+            layout[name] = (arrays, frequencies)
+
+        print(f"Running {len(tasks)} tasks on {min(workers, len(tasks))} worker processes...")
+        rows = []
+        failed = 0
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), initializer=_attach,
+                                 initargs=(layout,)) as pool:
+            futures = {pool.submit(_run_task, task): task for task in tasks}
+            for i, future in enumerate(as_completed(futures), 1):
+                dataset, method, counts = futures[future][:3]
+                try:
+                    rows.extend(future.result())
+                    print(f"Finished task {i}/{len(tasks)}: {dataset} {method} {counts}")
+                except Exception as e:
+                    failed += 1
+                    print(f"Error in task {dataset} {method} {counts}: {str(e)}")
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    # Stable order regardless of completion order
+    rows.sort(key=lambda row: (row['dataset'], METHODS.index(row['method']), row['n_sensors'], row['rank']))
+    columns = list(rows[0]) if rows else ['dataset', 'method', 'n_sensors', 'rank', 'node']
+    table = {column: np.array([row[column] for row in rows]) for column in columns}
+
+    name, extension = os.path.splitext(output)
+    formats = {ext: fmt for fmt, (ext, _, _) in WRITERS.items()}
+    if extension not in formats:
+        raise ValueError(f"Unsupported output extension '{extension}'")
+    exporter = ResultExporter(output_dir=os.path.dirname(name))
+    path = exporter.export_table(table, os.path.basename(name), formats[extension], 'batch results')
+    return path, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run sensor placement jobs without the GUI")
+    parser.add_argument('job_file', help="JSON job file")
+    parser.add_argument('--workers', type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument('--output', help="Results table (.csv, .xlsx, .npz, .parquet or .feather)")
+    args = parser.parse_args(argv)
+
+    with open(args.job_file) as f:
+        config = json.load(f)
+    _, failed = run_batch(config, args.workers, args.output)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
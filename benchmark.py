@@ -0,0 +1,215 @@
+"""
+Benchmark the optimisation pipeline on synthetic data.
+
+Usage:
+    python benchmark.py [--quick] [--nodes 1000 10000 ...] [--modes 5 20 50]
+                        [--output benchmark.json] [--baseline previous.json]
+
+Every stage (ingestion, normalisation, EFI, EFI-DPR, forward selection,
+GA generations, plotting and export) is timed on synthetic beam and
+plate datasets for each mesh size and mode count. The peak Python/NumPy
+memory of each stage is measured with tracemalloc. The JSON report can be compared against a
+previous one with --baseline to flag slow-downs.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+import numpy as np
+from optimizer import SensorOptimizer
+from genetic import GeneticOptimizer
+from export import ResultExporter
+from session import ModeStore
+from synthetic import synthetic_dataset, write_fixtures
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _max_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return rss / 2**20 if sys.platform == 'darwin' else rss / 2**10
+
+
+class StageTimer:
+    """Times benchmark stages and records their peak traced memory"""
+
+    def __init__(self):
+        self.records = []
+
+    def run(self, case, stage, func, repeat=1):
+        """
+        Time a stage and store its record.
+
+        Args:
+            case (dict): Dataset description added to the record
+            stage (str): Stage name
+            func (callable): Zero-argument function running the stage
+            repeat (int): Number of units of work func performs (e.g. generations);
+                'seconds_per_unit' is added when greater than 1
+
+        Returns:
+            object: Return value of func, or None when it failed
+        """
+        record = dict(case, stage=stage)
+        tracemalloc.start()
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        value = None
+        try:
+            value = func()
+        except Exception as e:
+            record['error'] = f"{type(e).__name__}: {str(e)}"
+        record['seconds'] = time.perf_counter() - start
+        record['peak_mb'] = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+        if repeat > 1:
+            record['seconds_per_unit'] = record['seconds'] / repeat
+        status = record.get('error', f"{record['seconds']:.3f} s, peak {record['peak_mb']:.1f} MB")
+        print(f"{case['kind']:>5} {case['n_nodes']:>8} nodes {case['n_modes']:>3} modes  {stage:<16} {status}")
+        self.records.append(record)
+        return value
+
+
+def benchmark_case(timer, kind, n_nodes, n_modes, args, workdir):
+    """Run every stage on one synthetic dataset"""
+    case = {'kind': kind, 'n_nodes': n_nodes, 'n_modes': n_modes}
+    data = timer.run(case, 'generate', lambda: synthetic_dataset(kind, n_nodes, n_modes, seed=args.seed))
+    if data is None:
+        return
+    nodes, raw, frequencies = data
+    n_sensors = min(args.sensors, n_nodes)
+
+    optimizer = SensorOptimizer(None, [], n_sensors, modal_frequencies=frequencies, cache_dir=None)
+    optimizer.plot_mode = 'sync'
+    optimizer.plot_dpi = args.dpi
+    optimizer.exporter = ResultExporter(matrix_format=args.export_format, output_dir=workdir)
+
+    if n_nodes <= args.fixture_limit:
+        fixtures = os.path.join(workdir, f"{kind}-{n_nodes}-{n_modes}")
+        xyz_file, mode_files = write_fixtures(fixtures, nodes, raw)
+        optimizer.xyz_file, optimizer.mode_files = xyz_file, mode_files
+        optimizer.session.clear()
+        timer.run(case, 'ingestion', lambda: (optimizer.read_coordinates(), optimizer.prepare_displacement_data()))
+
+    # Normalise and store the in-memory columns the way prepare_displacement_data does
+    store = ModeStore()
+    columns = [f"DEF{'XYZ'[j % 3]}{j // 3 + 1}" for j in range(raw.shape[1])]
+    mode_matrix = timer.run(case, 'normalisation',
+                            lambda: store.get(columns, lambda paths: SensorOptimizer.normalise_columns(raw)))
+    del raw
+    optimizer.use_data(nodes, mode_matrix)
+
+    timer.run(case, 'efi_batch', lambda: optimizer.effective_independence(mode='batch'))
+    if n_nodes <= args.sequential_limit:
+        timer.run(case, 'efi_sequential', lambda: optimizer.compute_elimination_order(n_sensors))
+    timer.run(case, 'efi_dpr', optimizer.effective_independence_dpr)
+    timer.run(case, 'forward', lambda: optimizer.select_forward(n_sensors))
+
+    ga = GeneticOptimizer(population_size=args.population, generations=args.generations, seed=args.seed)
+    population = ga.initialize_population(n_nodes, n_sensors)
+    evolved = timer.run(case, 'ga_generations',
+                        lambda: ga.evolve(population, mode_matrix, 'EFI', optimizer.modal_frequencies, verbose=False),
+                        repeat=args.generations)
+
+    selected = evolved[2] if evolved is not None else np.arange(n_sensors)
+    results = {'POS': optimizer.POS[selected], 'COO': nodes[selected], 'Ed': np.ones(len(selected))}
+    if not args.no_plots:
+        timer.run(case, 'plotting', lambda: optimizer.plot_nodes(nodes, 'Benchmark Plot', selected))
+    timer.run(case, 'export', lambda: optimizer.save_results(results, suffix=f'_{kind}_{n_nodes}_{n_modes}'))
+
+
+def compare(report, baseline, threshold):
+    """
+    Print stages that became slower than the baseline by more than threshold.
+
+    Returns:
+        int: Number of regressions
+    """
+    previous = {(r['kind'], r['n_nodes'], r['n_modes'], r['stage']): r for r in baseline['results']}
+    regressions = 0
+    for record in report['results']:
+        old = previous.get((record['kind'], record['n_nodes'], record['n_modes'], record['stage']))
+        if old is None or 'error' in record or 'error' in old or old['seconds'] <= 0:
+            continue
+        ratio = record['seconds'] / old['seconds']
+        if ratio > threshold:
+            regressions += 1
+            print(f"Regression: {record['kind']} {record['n_nodes']} nodes {record['n_modes']} modes "
+                  f"{record['stage']}: {old['seconds']:.3f} s -> {record['seconds']:.3f} s ({ratio:.2f}x)")
+    print(f"{regressions} regressions against the baseline (threshold {threshold:.2f}x)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the optimisation pipeline on synthetic data")
+    parser.add_argument('--kinds', nargs='+', default=['beam', 'plate'], choices=['beam', 'plate'])
+    parser.add_argument('--nodes', nargs='+', type=int, default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--modes', nargs='+', type=int, default=[5, 20, 50])
+    parser.add_argument('--quick', action='store_true', help="Only 1k and 10k nodes with 5 and 20 modes")
+    parser.add_argument('--sensors', type=int, default=20)
+    parser.add_argument('--generations', type=int, default=10)
+    parser.add_argument('--population', type=int, default=70)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--dpi', type=int, default=100)
+    parser.add_argument('--no-plots', action='store_true')
+    parser.add_argument('--export-format', default='npz')
+    parser.add_argument('--fixture-limit', type=int, default=10000,
+                        help="Largest mesh for which xlsx fixtures are written and ingested")
+    parser.add_argument('--sequential-limit', type=int, default=20000,
+                        help="Largest mesh for the exact sequential elimination")
+    parser.add_argument('--output', default='benchmark.json')
+    parser.add_argument('--baseline', help="Previous report to compare against")
+    parser.add_argument('--threshold', type=float, default=1.25, help="Slow-down ratio reported as a regression")
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.nodes, args.modes = [1000, 10000], [5, 20]
+
+    timer = StageTimer()
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix='osp-bench-') as workdir:
+        # Plots and exports are written to the scratch directory
+        os.chdir(workdir)
+        try:
+            for kind in args.kinds:
+                for n_nodes in args.nodes:
+                    for n_modes in args.modes:
+                        benchmark_case(timer, kind, n_nodes, n_modes, args, workdir)
+        finally:
+            os.chdir(cwd)
+
+    report = {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'cpu_count': os.cpu_count(),
+            'max_rss_mb': _max_rss_mb()
+        },
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'baseline')},
+        'results': timer.records
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Benchmark report saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            return 1 if compare(report, json.load(f), args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+import glob
+import hashlib
+import os
+import numpy as np
+
+
+class DatasetCache:
+    """
+    Persistent on-disk cache of arrays parsed from the Excel input files.
+
+    Each entry is stored as an .npy file whose name combines a hash of the
+    source path with a key built from the file size, modification time
+    and content hash. A changed source file therefore misses the cache,
+    is parsed again and replaces its stale entry.
+    """
+
+    def __init__(self, cache_dir='.osp_cache'):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def file_key(path, *extra):
+        """
+        Build the cache key of a source file.
+
+        Args:
+            path (str): Source file path
+            *extra: Additional values that change the cached content (e.g. column names)
+
+        Returns:
+            str: Hex digest identifying the file version and extra values
+        """
+        stat = os.stat(path)
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        key = hashlib.sha256()
+        for part in (os.path.abspath(path), stat.st_size, stat.st_mtime_ns, digest.hexdigest(), *extra):
+            key.update(str(part).encode())
+            key.update(b'\0')
+        return key.hexdigest()
+
+    @staticmethod
+    def _name_prefix(name):
+        return hashlib.sha256(str(name).encode()).hexdigest()[:16]
+
+    def _entry_path(self, name, key):
+        return os.path.join(self.cache_dir, f"{self._name_prefix(name)}-{key[:32]}.npy")
+
+    def lookup(self, name, key):
+        """
+        Return a cached array, or None when the entry is missing or unreadable.
+
+        Args:
+            name (str): Stable entry name (usually the source path)
+            key (str): Version key of the entry (see file_key)
+
+        Returns:
+            np.ndarray: Cached array or None
+        """
+        entry = self._entry_path(name, key)
+        if os.path.exists(entry):
+            try:
+                array = np.load(entry)
+                self.hits += 1
+                return array
+            except (OSError, ValueError) as e:
+                print(f"Discarding unreadable cache entry {entry}: {str(e)}")
+        self.misses += 1
+        return None
+
+    def put(self, name, key, array):
+        """
+        Store an array, replacing any older version of the same entry.
+
+        Args:
+            name (str): Stable entry name (usually the source path)
+            key (str): Version key of the entry (see file_key)
+            array (np.ndarray): Array to store
+        """
+        entry = self._entry_path(name, key)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Drop stale versions of the same entry
+            for stale in glob.glob(os.path.join(self.cache_dir, f"{self._name_prefix(name)}-*.npy")):
+                os.remove(stale)
+            tmp = f"{entry}.{os.getpid()}.tmp"
+            with open(tmp, 'wb') as f:
+                np.save(f, array)
+            os.replace(tmp, entry)
+        except OSError as e:
+            print(f"Could not write cache entry {entry}: {str(e)}")
+
+    def get(self, name, key, loader):
+        """
+        Return a cached array, building and storing it on a miss.
+
+        Args:
+            name (str): Stable entry name (usually the source path)
+            key (str): Version key of the entry (see file_key)
+            loader (callable): Zero-argument function that builds the array
+
+        Returns:
+            np.ndarray: Cached or freshly built array
+        """
+        array = self.lookup(name, key)
+        if array is None:
+            array = np.asarray(loader())
+            self.put(name, key, array)
+        return array
+
+    def load(self, path, columns, loader):
+        """
+        Return the array parsed from a source file, using the cache when it is current.
+
+        Args:
+            path (str): Source file path
+            columns (list): Column names parsed from the file
+            loader (callable): Zero-argument function that parses the file
+
+        Returns:
+            np.ndarray: Parsed array
+        """
+        return self.get(path, self.file_key(path, *columns), loader)
+
+    def clear(self):
+        """Remove every entry from the cache directory"""
+        for entry in glob.glob(os.path.join(self.cache_dir, '*.npy')):
+            os.remove(entry)
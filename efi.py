@@ -0,0 +1,736 @@
+import time
+import numpy as np
+from scipy.linalg import eigh, solve_triangular
+from instrument import span, count
+
+# Eigenvalues of the Fisher matrix below this value are treated as zero
+RANK_TOL = 1e-10
+# Downdates whose 1 - Ed falls below this value are treated as rank drops
+DOWNDATE_TOL = 1e-8
+# Working memory of one row chunk in the chunked computations
+CHUNK_BYTES = 1 << 26
+# Prior FIM of forward selection, relative to the mean Fisher eigenvalue
+FORWARD_RIDGE = 1e-6
+
+
+def row_chunks(mode_matrix, rows=None, chunk_bytes=CHUNK_BYTES):
+    """
+    Iterate over the (selected) rows of a mode matrix in float64 chunks.
+
+    Only one chunk is read at a time, so memory-mapped or float32
+    matrices are processed within a fixed working memory.
+
+    Args:
+        mode_matrix (np.ndarray): Mode shape matrix (n_dofs x n_modes), possibly memory-mapped
+        rows (np.ndarray): Row indices to use (None uses every row)
+        chunk_bytes (int): Size of one float64 chunk
+
+    Yields:
+        np.ndarray: Chunk of rows (chunk x n_modes)
+    """
+    n_rows = mode_matrix.shape[0] if rows is None else len(rows)
+    step = max(1, chunk_bytes // (8 * max(1, mode_matrix.shape[1])))
+    for start in range(0, n_rows, step):
+        block = mode_matrix[start:start + step] if rows is None else mode_matrix[rows[start:start + step]]
+        yield np.asarray(block, dtype=np.float64)
+
+
+def fisher_matrix(mode_matrix, rows=None, chunk_bytes=CHUNK_BYTES):
+    """
+    Build the mode-space Fisher information matrix.
+
+    Args:
+        mode_matrix (np.ndarray): Mode shape matrix (n_dofs x n_modes)
+        rows (np.ndarray): Row indices to use (None uses every row)
+        chunk_bytes (int): Working memory of one row chunk
+
+    Returns:
+        np.ndarray: Fisher matrix (n_modes x n_modes), accumulated in float64
+    """
+    fisher = np.zeros((mode_matrix.shape[1], mode_matrix.shape[1]))
+    for block in row_chunks(mode_matrix, rows, chunk_bytes):
+        fisher += block.T @ block
+    return fisher
+
+
+def _whitening(mode_matrix, tol, rows=None, chunk_bytes=CHUNK_BYTES):
+    # Maps mode shape rows to orthonormal-basis rows: basis = Phi @ W
+    with span('eig'):
+        count('lapack.eigh')
+        eigenvals, eigenvects = eigh(fisher_matrix(mode_matrix, rows, chunk_bytes))
+    keep = eigenvals > tol
+    eigenvals = eigenvals[keep]
+    return eigenvects[:, keep] / np.sqrt(eigenvals), eigenvals
+
+
+def orthonormal_basis(mode_matrix, tol=RANK_TOL, rows=None, chunk_bytes=CHUNK_BYTES):
+    """
+    Orthonormal basis of the column space of the mode matrix.
+
+    The basis is obtained from the eigen-decomposition of the small
+    Fisher matrix, so the n_dofs x n_dofs matrix is never formed. Its
+    columns are the eigenvectors of ``mode_matrix @ mode_matrix.T`` that
+    belong to non-zero eigenvalues.
+
+    Args:
+        mode_matrix (np.ndarray): Mode shape matrix (n_dofs x n_modes)
+        tol (float): Eigenvalues at or below this value are discarded
+        rows (np.ndarray): Row indices to use (None uses every row)
+        chunk_bytes (int): Working memory of one row chunk
+
+    Returns:
+        tuple: (basis (n_rows x rank), non-zero Fisher eigenvalues)
+    """
+    whitening, eigenvals = _whitening(mode_matrix, tol, rows, chunk_bytes)
+    blocks = [block @ whitening for block in row_chunks(mode_matrix, rows, chunk_bytes)]
+    basis = np.concatenate(blocks) if blocks else np.empty((0, len(eigenvals)))
+    return basis, eigenvals
+
+
+def leverage(mode_matrix, tol=RANK_TOL, rows=None, chunk_bytes=CHUNK_BYTES):
+    """
+    Effective independence value of every DOF.
+
+    Ed is the diagonal of the projector onto the mode space,
+    ``Phi (Phi^T Phi)^-1 Phi^T``, computed in O(n_dofs * n_modes^2).
+    The Fisher matrix and Ed are accumulated over row chunks, so the
+    working memory does not grow with n_dofs.
+
+    Args:
+        mode_matrix (np.ndarray): Mode shape matrix (n_dofs x n_modes), possibly memory-mapped
+        tol (float): Rank tolerance on the Fisher eigenvalues
+        rows (np.ndarray): Active row indices (None uses every row); the
+            remaining rows are treated as removed
+        chunk_bytes (int): Working memory of one row chunk
+
+    Returns:
+        np.ndarray: Ed value for each (active) DOF
+    """
+    whitening, _ = _whitening(mode_matrix, tol, rows, chunk_bytes)
+    Ed = [np.einsum('ij,ij->i', basis, basis)
+          for basis in (block @ whitening for block in row_chunks(mode_matrix, rows, chunk_bytes))]
+    return np.concatenate(Ed) if Ed else np.empty(0)
+
+
+def candidate_pool(mode_matrix, n_candidates=None, threshold=None, weights=None, tol=RANK_TOL,
+                   chunk_bytes=CHUNK_BYTES):
+    """
+    Informative DOFs to restrict a sensor search to.
+
+    DOFs are scored by their leverage, optionally multiplied by weights.
+    A plain top-N by score concentrates where many modes peak together
+    and can leave some modes without candidates, so n_candidates is split
+    evenly over the orthonormal mode directions: for each direction the
+    DOFs holding the largest share of it are kept, and the pool is trimmed
+    to n_candidates by each DOF's best place in any direction. When the
+    quotas overlap or are cut by the threshold, the pool is topped up with
+    the best-scoring remaining DOFs. Both passes run over row chunks.
+
+    Args:
+        mode_matrix (np.ndarray): Mode shape matrix (n_dofs x n_modes), possibly memory-mapped
+        n_candidates (int): Number of DOFs to keep, fewer only when fewer pass
+            the threshold (None keeps every DOF)
+        threshold (float): Keep DOFs scoring at least this fraction of the best score
+        weights (np.ndarray): Optional per-DOF weights (e.g. normalised DPR)
+        tol (float): Rank tolerance on the Fisher eigenvalues
+        chunk_bytes (int): Working memory of one row chunk
+
+    Returns:
+        tuple: (sorted candidate indices, score of every DOF)
+    """
+    whitening, _ = _whitening(mode_matrix, tol, chunk_bytes=chunk_bytes)
+    n_dofs, rank = mode_matrix.shape[0], whitening.shape[1]
+    quota = max(1, -(-n_candidates // rank)) if n_candidates else 0
+    scores = np.empty(n_dofs)
+    best_share = np.empty((0, rank))
+    best_rows = np.empty((0, rank), dtype=np.int64)
+    offset = 0
+    for block in row_chunks(mode_matrix, chunk_bytes=chunk_bytes):
+        share = (block @ whitening) ** 2
+        if weights is not None:
+            share *= weights[offset:offset + len(block), None]
+        scores[offset:offset + len(block)] = share.sum(axis=1)
+        if quota:
+            # Running top-quota rows of every direction
+            rows = np.broadcast_to(np.arange(offset, offset + len(block))[:, None], share.shape)
+            best_share = np.concatenate([best_share, share])
+            best_rows = np.concatenate([best_rows, rows])
+            if len(best_share) > quota:
+                top = np.argpartition(-best_share, quota - 1, axis=0)[:quota]
+                best_share = np.take_along_axis(best_share, top, axis=0)
+                best_rows = np.take_along_axis(best_rows, top, axis=0)
+        offset += len(block)
+
+    keep = np.ones(n_dofs, dtype=bool)
+    if threshold is not None:
+        keep &= scores >= threshold * np.max(scores)
+    if quota:
+        # Rank every pooled DOF by its best place in any direction, then trim
+        # the pool to n_candidates (the quotas round up and may overlap)
+        order = np.argsort(-best_share, axis=0)
+        places = np.broadcast_to(np.arange(len(order))[:, None], order.shape)
+        rows = np.take_along_axis(best_rows, order, axis=0)
+        pooled = np.take_along_axis(best_share, order, axis=0) > 0
+        place = np.full(n_dofs, np.inf)
+        np.minimum.at(place, rows[pooled], places[pooled])
+        place[~keep] = np.inf
+        candidates = np.flatnonzero(np.isfinite(place))
+        ranked = candidates[np.lexsort((-scores[candidates], place[candidates]))]
+        if len(ranked) < n_candidates:
+            rest = np.flatnonzero(keep & ~np.isfinite(place))
+            ranked = np.concatenate([ranked, rest[np.argsort(-scores[rest], kind='stable')]])
+        return np.sort(ranked[:n_candidates]), scores
+    return np.flatnonzero(keep), scores
+
+
+def column_frequencies(frequencies, n_columns, per_column=False):
+    """
+    Modal frequency of every column of the mode matrix.
+
+    Columns are ordered X, Y, Z per mode, so each per-mode frequency is
+    repeated three times; only the first n_columns / 3 entries are used,
+    so a longer list of known frequencies can be passed for any number of
+    selected modes.
+
+    Args:
+        frequencies (np.ndarray): Modal frequencies, one per mode
+        n_columns (int): Number of mode matrix columns
+        per_column (bool): frequencies holds exactly one value per column instead
+
+    Returns:
+        np.ndarray: Frequency of each column
+
+    Raises:
+        ValueError: If the vector does not cover the columns or holds non-positive values
+    """
+    frequencies = np.asarray(frequencies, dtype=np.float64).ravel()
+    if per_column:
+        if len(frequencies) != n_columns:
+            raise ValueError(f"{len(frequencies)} per-column modal frequencies do not match "
+                             f"{n_columns} mode columns")
+        values = frequencies
+    else:
+        if n_columns % 3 or len(frequencies) < n_columns // 3:
+            raise ValueError(f"{len(frequencies)} modal frequencies do not cover {n_columns} mode columns "
+                             f"(expected one frequency per mode, X/Y/Z columns per mode)")
+        values = np.repeat(frequencies[:n_columns // 3], 3)
+    if not np.all(np.isfinite(values) & (values > 0)):
+        raise ValueError("Modal frequencies must be positive and finite")
+    return values
+
+
+def driving_point_residue(mode_matrix, frequencies, chunk_bytes=CHUNK_BYTES, per_column=False):
+    """
+    Driving point residue of every DOF, ``sum_j phi_ij^2 / f_j``.
+
+    Computed as one matrix-vector product per row chunk.
+
+    Args:
+        mode_matrix (np.ndarray): Mode shape matrix (n_dofs x n_columns), possibly memory-mapped
+        frequencies (np.ndarray): Modal frequencies (see column_frequencies)
+        chunk_bytes (int): Working memory of one row chunk
+        per_column (bool): frequencies holds one value per column instead of per mode
+
+    Returns:
+        np.ndarray: DPR value for each DOF
+    """
+    inverse = 1.0 / column_frequencies(frequencies, mode_matrix.shape[1], per_column)
+    dpr = [np.square(block) @ inverse for block in row_chunks(mode_matrix, chunk_bytes=chunk_bytes)]
+    return np.concatenate(dpr) if dpr else np.empty(0)
+
+
+def elimination_order(mode_matrix, n_keep=1, tol=RANK_TOL, progress=None, chunk_bytes=CHUNK_BYTES):
+    """
+    Exact EFI backward elimination, one DOF per step, with full history.
+
+    The DOF with the lowest Ed is removed at every step. The inverse
+    Fisher matrix and every remaining Ed value are then updated with a
+    Sherman-Morrison downdate, so a step costs O(n_dofs * n_modes) and
+    the Fisher matrix is never refactorised while it stays non-singular.
+    The FIM log-determinant follows from the matrix determinant lemma,
+    ``det(F - phi phi^T) = det(F) * (1 - Ed)``.
+
+    Because the sensor set for m sensors is a suffix of the removal
+    order, one run answers every sensor count down to n_keep.
+
+    The mode matrix is only read in row chunks, but every step updates
+    the Ed of all remaining DOFs from their orthonormal-basis rows, so
+    that n_dofs x rank float64 basis is the working set of the method and
+    is held in full, outside the chunk_bytes budget.
+
+    Args:
+        mode_matrix (np.ndarray): Mode shape matrix (n_dofs x n_modes)
+        n_keep (int): Number of DOFs left when the elimination stops
+        tol (float): Rank tolerance on the Fisher eigenvalues
+        progress (callable): Optional progress(fraction) called about every 1% of the steps
+        chunk_bytes (int): Working memory of one row chunk when reading the mode matrix
+
+    Returns:
+        dict: 'order' holds every DOF index in removal order, with the
+            n_keep survivors last in ascending Ed order; 'Ed' holds the
+            Ed value of each of those DOFs when it was removed (final
+            value for survivors); 'logdet' holds the log pseudo-
+            determinant of the FIM for each sensor count (NaN below
+            n_keep)
+    """
+    n_dofs = mode_matrix.shape[0]
+    n_keep = max(1, min(n_keep, n_dofs))
+    active = np.arange(n_dofs)
+    rows, eigenvals = orthonormal_basis(mode_matrix, tol, chunk_bytes=chunk_bytes)
+    # In the orthonormal basis the initial Fisher matrix is the identity
+    inv_fisher = np.eye(rows.shape[1])
+    Ed = np.einsum('ij,ij->i', rows, rows)
+    removed = np.zeros(n_dofs, dtype=bool)
+    n_active = n_dofs
+
+    order = np.empty(n_dofs, dtype=np.int64)
+    ed_history = np.empty(n_dofs)
+    logdet = np.full(n_dofs + 1, np.nan)
+    logdet[n_dofs] = np.sum(np.log(eigenvals))
+    n_steps = n_dofs - n_keep
+    report_every = max(1, n_steps // 100)
+
+    while n_active > n_keep:
+        j = np.argmin(np.where(removed, np.inf, Ed))
+        denom = 1.0 - Ed[j]
+        step = n_dofs - n_active
+        if progress is not None and step % report_every == 0:
+            progress(step / n_steps)
+        order[step] = active[j]
+        ed_history[step] = Ed[j]
+        removed[j] = True
+        n_active -= 1
+
+        if denom <= DOWNDATE_TOL:
+            # Removing this DOF drops the rank of the FIM: refactorise the
+            # remaining DOFs in their own (smaller) mode space
+            active = active[~removed]
+            rows, eigenvals = orthonormal_basis(mode_matrix, tol, active, chunk_bytes)
+            inv_fisher = np.eye(rows.shape[1])
+            Ed = np.einsum('ij,ij->i', rows, rows)
+            removed = np.zeros(n_active, dtype=bool)
+            logdet[n_active] = np.sum(np.log(eigenvals))
+            continue
+
+        # Sherman-Morrison downdate of the inverse FIM and of all Ed values
+        u = inv_fisher @ rows[j]
+        Ed += (rows @ u)**2 / denom
+        inv_fisher += np.outer(u, u) / denom
+        logdet[n_active] = logdet[n_active + 1] + np.log(denom)
+
+        # Compact the working arrays once half of them are stale
+        if n_active <= len(active) // 2:
+            keep = ~removed
+            active, rows, Ed = active[keep], rows[keep], Ed[keep]
+            removed = np.zeros(n_active, dtype=bool)
+
+    keep = ~removed
+    survivors = np.argsort(Ed[keep])
+    order[n_dofs - n_keep:] = active[keep][survivors]
+    ed_history[n_dofs - n_keep:] = Ed[keep][survivors]
+    return {'order': order, 'Ed': ed_history, 'logdet': logdet}
+
+
+def _cholesky_update(lower, vector):
+    # In-place rank-one update: lower @ lower.T + vector vector^T, O(n^2)
+    vector = vector.copy()
+    for j in range(len(vector)):
+        radius = np.hypot(lower[j, j], vector[j])
+        cos, sin = radius / lower[j, j], vector[j] / lower[j, j]
+        lower[j, j] = radius
+        lower[j + 1:, j] = (lower[j + 1:, j] + sin * vector[j + 1:]) / cos
+        vector[j + 1:] = cos * vector[j + 1:] - sin * lower[j + 1:, j]
+    return lower
+
+
+def forward_selection(mode_matrix, n_sensors, ridge=FORWARD_RIDGE, chunk_bytes=CHUNK_BYTES, progress=None):
+    """
+    Greedy D-optimal forward selection of sensors.
+
+    Starting from a small prior FIM ``eps * I``, each step adds the DOF
+    with the largest log-determinant gain ``log(1 + phi^T F^-1 phi)``.
+    The FIM is kept as a Cholesky factor with rank-one updates, and the
+    gain of every candidate follows from a Sherman-Morrison update,
+    ``d_i -= (phi_i^T u)^2 / (1 + d_*)`` with ``u = F^-1 phi_*``, so a
+    step costs O(n_dofs * n_modes) and the whole selection
+    O(n_dofs * n_modes * n_sensors). The selection for fewer sensors is
+    a prefix of the returned order.
+
+    Args:
+        mode_matrix (np.ndarray): Mode shape matrix (n_dofs x n_modes), possibly memory-mapped
+        n_sensors (int): Number of sensors to select
+        ridge (float): Prior FIM scale relative to the mean Fisher eigenvalue
+        chunk_bytes (int): Working memory of one row chunk
+        progress (callable): Optional progress(fraction) called after every step
+
+    Returns:
+        dict: 'order' holds the selected DOFs in selection order, 'gain'
+            the log-determinant gain of each and 'logdet' the log-
+            determinant of the (regularised) FIM after each step
+    """
+    n_dofs, n_modes = mode_matrix.shape
+    n_sensors = min(n_sensors, n_dofs)
+    scale = np.trace(fisher_matrix(mode_matrix, chunk_bytes=chunk_bytes)) / max(1, n_modes)
+    eps = ridge * scale if scale > 0 else ridge
+    lower = np.sqrt(eps) * np.eye(n_modes)
+
+    # Quadratic form phi_i^T F^-1 phi_i of every candidate under the prior
+    scores = np.concatenate([np.einsum('ij,ij->i', block, block)
+                             for block in row_chunks(mode_matrix, None, chunk_bytes)]) / eps
+    order = np.empty(n_sensors, dtype=np.int64)
+    gain = np.empty(n_sensors)
+    logdet = np.empty(n_sensors)
+    current = n_modes * np.log(eps)
+
+    for step in range(n_sensors):
+        best = int(np.argmax(scores))
+        phi = np.asarray(mode_matrix[best], dtype=np.float64)
+        order[step] = best
+        gain[step] = np.log1p(scores[best])
+        current += gain[step]
+        logdet[step] = current
+
+        # u = F^-1 phi from the current factor, then update every candidate
+        u = solve_triangular(lower.T, solve_triangular(lower, phi, lower=True), lower=False)
+        denom = 1.0 + scores[best]
+        offset = 0
+        for block in row_chunks(mode_matrix, None, chunk_bytes):
+            scores[offset:offset + len(block)] -= (block @ u)**2 / denom
+            offset += len(block)
+        _cholesky_update(lower, phi)
+        scores[order[:step + 1]] = -np.inf
+        if progress is not None:
+            progress((step + 1) / n_sensors)
+
+    return {'order': order, 'gain': gain, 'logdet': logdet}
+
+
+def log_det_batch(selected_modes, tol=RANK_TOL):
+    """
+    Log pseudo-determinant of the FIM for a stack of sensor sets.
+
+    The non-zero eigenvalues of ``Phi_s Phi_s^T`` and ``Phi_s^T Phi_s``
+    coincide, so the smaller of the two Gram matrices is decomposed for
+    the whole stack in one batched LAPACK call.
+
+    Args:
+        selected_modes (np.ndarray): Mode shapes of each set (n_sets x n_sensors x n_modes)
+        tol (float): Eigenvalues at or below this value are ignored
+
+    Returns:
+        np.ndarray: Sum of the log of the non-zero FIM eigenvalues of each set
+    """
+    n_sensors, n_modes = selected_modes.shape[1:]
+    transposed = selected_modes.transpose(0, 2, 1)
+    if n_sensors >= n_modes:
+        fim = transposed @ selected_modes
+    else:
+        fim = selected_modes @ transposed
+    count('lapack.eigvalsh', len(fim))
+    eigenvals = np.linalg.eigvalsh(fim)
+    nonzero = eigenvals > tol
+    return np.sum(np.log(np.where(nonzero, eigenvals, 1.0)), axis=1)
+
+
+class FisherFactor:
+    """
+    Inverse and log-determinant of a non-singular Fisher matrix.
+
+    Exchanging one sensor for another is a rank-two change of the FIM.
+    Its log-determinant follows from a rank-one removal and a rank-one
+    addition (matrix determinant lemma, Sherman-Morrison), so a sensor
+    set one swap away from a factorised set is scored in O(n_modes^2).
+    """
+
+    def __init__(self, inverse, logdet):
+        self.inverse = inverse
+        self.logdet = logdet
+
+    @classmethod
+    def from_modes(cls, selected_modes, tol=RANK_TOL, ridge=0.0):
+        """
+        Factorise the FIM of a sensor set.
+
+        Args:
+            selected_modes (np.ndarray): Mode shapes of the set (n_sensors x n_modes)
+            tol (float): Smallest accepted Fisher eigenvalue
+            ridge (float): Prior ``ridge * I`` added to the FIM
+
+        Returns:
+            FisherFactor: Factor, or None when the FIM is singular
+        """
+        fisher = fisher_matrix(selected_modes)
+        if ridge:
+            fisher += ridge * np.eye(len(fisher))
+        count('lapack.eigh')
+        eigenvals, eigenvects = eigh(fisher)
+        if eigenvals[0] <= tol:
+            return None
+        return cls((eigenvects / eigenvals) @ eigenvects.T, np.sum(np.log(eigenvals)))
+
+    @classmethod
+    def from_modes_batch(cls, selected_modes, tol=RANK_TOL):
+        """
+        Factorise the FIMs of a stack of sensor sets in one batched call.
+
+        Args:
+            selected_modes (np.ndarray): Mode shapes of each set (n_sets x n_sensors x n_modes)
+            tol (float): Eigenvalues at or below this value are ignored
+
+        Returns:
+            tuple: (log pseudo-determinant of each FIM, list of factors with None for singular FIMs)
+        """
+        fim = selected_modes.transpose(0, 2, 1) @ selected_modes
+        count('lapack.eigh', len(fim))
+        eigenvals, eigenvects = np.linalg.eigh(fim)
+        nonzero = eigenvals > tol
+        logdets = np.sum(np.log(np.where(nonzero, eigenvals, 1.0)), axis=1)
+        factors = []
+        for vals, vects, full_rank, logdet in zip(eigenvals, eigenvects, nonzero.all(axis=1), logdets):
+            factors.append(cls((vects / vals) @ vects.T, logdet) if full_rank else None)
+        return logdets, factors
+
+    def _downdate(self, removed):
+        # Rank-one removal: inverse direction and determinant ratio
+        direction = removed @ self.inverse
+        ratio = 1.0 - np.sum(removed * direction, axis=-1)
+        return direction, ratio
+
+    def swap_logdet(self, removed, added):
+        """
+        Log-determinant after exchanging sensors, vectorised over pairs.
+
+        Args:
+            removed (np.ndarray): Mode shape row(s) leaving the set (n_modes or n_pairs x n_modes)
+            added (np.ndarray): Mode shape row(s) entering the set, paired with removed
+
+        Returns:
+            np.ndarray: Log-determinant per pair (-inf where the removal makes the FIM singular)
+        """
+        removed = np.atleast_2d(removed)
+        added = np.atleast_2d(added)
+        direction, alpha = self._downdate(removed)
+        cross = np.sum(direction * added, axis=1)
+        safe = alpha > DOWNDATE_TOL
+        alpha = np.where(safe, alpha, 1.0)
+        beta = 1.0 + np.sum(added * (added @ self.inverse), axis=1) + cross**2 / alpha
+        return np.where(safe, self.logdet + np.log(alpha) + np.log(beta), -np.inf)
+
+    def exchange_logdet(self, removed, added):
+        """
+        Log-determinant for every (removed, added) exchange pair.
+
+        Args:
+            removed (np.ndarray): Rows that may leave the set (n_removed x n_modes)
+            added (np.ndarray): Rows that may enter the set (n_added x n_modes)
+
+        Returns:
+            np.ndarray: Log-determinants (n_removed x n_added), -inf for singular removals
+        """
+        direction, alpha = self._downdate(removed)
+        safe = alpha > DOWNDATE_TOL
+        alpha = np.where(safe, alpha, 1.0)
+        cross = direction @ added.T
+        gain = np.sum(added * (added @ self.inverse), axis=1)
+        beta = 1.0 + gain[None, :] + cross**2 / alpha[:, None]
+        logdet = self.logdet + np.log(alpha)[:, None] + np.log(beta)
+        return np.where(safe[:, None], logdet, -np.inf)
+
+    def swap(self, removed, added):
+        """
+        Factor of the set after exchanging one sensor.
+
+        Args:
+            removed (np.ndarray): Mode shape row leaving the set
+            added (np.ndarray): Mode shape row entering the set
+
+        Returns:
+            FisherFactor: Updated factor, or None when the removal makes the FIM singular
+        """
+        direction, alpha = self._downdate(removed)
+        if alpha <= DOWNDATE_TOL:
+            return None
+        inverse = self.inverse + np.outer(direction, direction) / alpha
+        added_direction = inverse @ added
+        beta = 1.0 + added @ added_direction
+        inverse -= np.outer(added_direction, added_direction) / beta
+        return FisherFactor(inverse, self.logdet + np.log(alpha) + np.log(beta))
+
+
+class GramFactor:
+    """
+    Inverse and log-determinant of the Gram matrix ``Phi_s Phi_s^T``.
+
+    With fewer sensors than mode columns the FIM is singular, but its
+    non-zero eigenvalues are those of the (n_sensors x n_sensors) Gram
+    matrix, so the log pseudo-determinant used as fitness is log det of
+    the Gram matrix. Exchanging one sensor replaces one row and column
+    of it; the determinant follows from two Schur complements, so a set
+    one swap away is scored in O(n_sensors^2 + n_sensors * n_modes).
+    The factor keeps the mode shape rows of its set for that update.
+    """
+
+    def __init__(self, rows, inverse, logdet):
+        self.rows = rows
+        self.inverse = inverse
+        self.logdet = logdet
+
+    @classmethod
+    def from_modes_batch(cls, selected_modes, tol=RANK_TOL):
+        """
+        Factorise the Gram matrices of a stack of sensor sets in one batched call.
+
+        Args:
+            selected_modes (np.ndarray): Mode shapes of each set (n_sets x n_sensors x n_modes)
+            tol (float): Eigenvalues at or below this value are ignored
+
+        Returns:
+            tuple: (log pseudo-determinant of each FIM, list of factors with None for singular sets)
+        """
+        gram = selected_modes @ selected_modes.transpose(0, 2, 1)
+        count('lapack.eigh', len(gram))
+        eigenvals, eigenvects = np.linalg.eigh(gram)
+        nonzero = eigenvals > tol
+        logdets = np.sum(np.log(np.where(nonzero, eigenvals, 1.0)), axis=1)
+        factors = []
+        for rows, vals, vects, full_rank, logdet in zip(selected_modes, eigenvals, eigenvects,
+                                                        nonzero.all(axis=1), logdets):
+            factors.append(cls(rows, (vects / vals) @ vects.T, logdet) if full_rank else None)
+        return logdets, factors
+
+    def swap(self, removed, added):
+        """
+        Factor of the set after exchanging one sensor.
+
+        Args:
+            removed (np.ndarray): Mode shape row leaving the set
+            added (np.ndarray): Mode shape row entering the set
+
+        Returns:
+            GramFactor: Updated factor, or None when the update is ill-conditioned
+        """
+        position = np.flatnonzero(np.all(self.rows == removed, axis=1))
+        if len(position) != 1:
+            return None
+        i = position[0]
+        others = np.arange(len(self.rows)) != i
+        # Removing row/column i: det ratio P_ii, inverse by a rank-one downdate
+        ratio = self.inverse[i, i]
+        column = self.inverse[others, i]
+        if ratio <= 0:
+            return None
+        kept = self.inverse[np.ix_(others, others)] - np.outer(column, column) / ratio
+        # Adding the new row/column: det ratio is its Schur complement
+        cross = self.rows[others] @ added
+        solved = kept @ cross
+        norm = added @ added
+        schur = norm - cross @ solved
+        if schur <= DOWNDATE_TOL * norm:
+            return None
+        inverse = np.empty_like(self.inverse)
+        inverse[np.ix_(others, others)] = kept + np.outer(solved, solved) / schur
+        inverse[others, i] = inverse[i, others] = -solved / schur
+        inverse[i, i] = 1.0 / schur
+        rows = self.rows.copy()
+        rows[i] = added
+        # det(G_-i) = det(G) * P_ii
+        return GramFactor(rows, inverse, self.logdet + np.log(ratio) + np.log(schur))
+
+
+def exchange_refinement(mode_matrix, selected, candidates=None, neighbours=None, max_iterations=1000,
+                        time_limit=None, ridge=FORWARD_RIDGE, chunk_bytes=CHUNK_BYTES, refactor_every=50):
+    """
+    Fedorov exchange: improve a sensor set by single swaps.
+
+    Every (selected, unselected) pair is scored with the rank-two
+    determinant update of FisherFactor.exchange_logdet, and the best
+    improving swap is applied, until no swap improves the FIM
+    log-determinant or a limit is reached. A small ridge prior keeps the
+    FIM invertible when there are fewer sensors than modes. The factor
+    is updated per swap and refactorised every refactor_every swaps.
+
+    Args:
+        mode_matrix (np.ndarray): Mode shape matrix (n_dofs x n_modes)
+        selected (np.ndarray): Initial sensor indices
+        candidates (np.ndarray): DOFs that may enter the set (None allows every DOF)
+        neighbours (callable): Optional neighbours(indices) returning, for each
+            selected DOF, an array of DOFs it may be exchanged with
+        max_iterations (int): Maximum number of swaps
+        time_limit (float): Wall-clock limit in seconds (None for no limit)
+        ridge (float): Prior FIM scale relative to the mean Fisher eigenvalue
+        chunk_bytes (int): Working memory of one block of swap scores
+        refactor_every (int): Swaps between full refactorisations
+
+    Returns:
+        dict: 'selected' (refined indices), 'initial_logdet', 'logdet',
+            'swaps' ((removed, added, logdet) per applied swap) and
+            'stop_reason' ('converged', 'iterations' or 'time_limit')
+    """
+    start = time.perf_counter()
+    selected = np.array(selected, dtype=np.int64)
+    n_dofs, n_modes = mode_matrix.shape
+    scale = np.trace(fisher_matrix(mode_matrix, chunk_bytes=chunk_bytes)) / max(1, n_modes)
+    eps = ridge * scale if scale > 0 else ridge
+    pool = np.arange(n_dofs) if candidates is None else np.unique(np.asarray(candidates, dtype=np.int64))
+
+    def factorise(indices):
+        return FisherFactor.from_modes(np.asarray(mode_matrix[indices], dtype=np.float64), tol=0.0, ridge=eps)
+
+    factor = factorise(selected)
+    initial = factor.logdet
+    swaps = []
+    stop_reason = 'converged'
+    while True:
+        if len(swaps) >= max_iterations:
+            stop_reason = 'iterations'
+            break
+        if time_limit is not None and time.perf_counter() - start >= time_limit:
+            stop_reason = 'time_limit'
+            break
+
+        removed_rows = np.asarray(mode_matrix[selected], dtype=np.float64)
+        best_logdet, best_pair = factor.logdet, None
+        if neighbours is None:
+            # Score every (selected, unselected) pair in blocks of the pool
+            unselected = pool[~np.isin(pool, selected)]
+            step = max(1, chunk_bytes // (8 * max(len(selected), n_modes)))
+            for offset in range(0, len(unselected), step):
+                added = unselected[offset:offset + step]
+                scores = factor.exchange_logdet(removed_rows, np.asarray(mode_matrix[added], dtype=np.float64))
+                i, j = np.unravel_index(np.argmax(scores), scores.shape)
+                if scores[i, j] > best_logdet:
+                    best_logdet, best_pair = scores[i, j], (i, added[j])
+        else:
+            # Only score swaps with each sensor's neighbourhood
+            rows, added = [], []
+            for i, options in enumerate(neighbours(selected)):
+                options = np.asarray(options, dtype=np.int64)
+                options = options[~np.isin(options, selected)]
+                if candidates is not None:
+                    options = options[np.isin(options, pool)]
+                rows.append(np.full(len(options), i))
+                added.append(options)
+            rows, added = np.concatenate(rows), np.concatenate(added)
+            if len(added):
+                scores = factor.swap_logdet(removed_rows[rows], np.asarray(mode_matrix[added], dtype=np.float64))
+                best = np.argmax(scores)
+                if scores[best] > best_logdet:
+                    best_logdet, best_pair = scores[best], (rows[best], added[best])
+
+        if best_pair is None or best_logdet - factor.logdet <= 1e-10 * max(1.0, abs(factor.logdet)):
+            break
+        i, new = best_pair
+        old = selected[i]
+        factor = factor.swap(removed_rows[i], np.asarray(mode_matrix[new], dtype=np.float64))
+        selected[i] = new
+        if factor is None or (len(swaps) + 1) % refactor_every == 0:
+            factor = factorise(selected)
+        swaps.append((int(old), int(new), float(factor.logdet)))
+
+    return {
+        'selected': selected,
+        'initial_logdet': float(initial),
+        'logdet': float(factor.logdet),
+        'swaps': swaps,
+        'stop_reason': stop_reason
+    }
@@ -0,0 +1,264 @@
+import hashlib
+import os
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from efi import CHUNK_BYTES
+
+# Matrix exports written (or being written) by this process, by file name
+_written = set()
+_written_lock = threading.Lock()
+
+
+def _has_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def write_npz(path, table):
+    np.savez(path, **table)
+
+
+def write_parquet(path, table):
+    pd.DataFrame(table).to_parquet(path, index=False)
+
+
+def write_feather(path, table):
+    pd.DataFrame(table).to_feather(path)
+
+
+def write_csv(path, table):
+    pd.DataFrame(table).to_csv(path, index=False)
+
+
+def write_xlsx(path, table):
+    pd.DataFrame(table).to_excel(path, index=False)
+
+
+def row_blocks(matrix, chunk_bytes=CHUNK_BYTES):
+    """
+    Yield (first row, contiguous block) pairs covering a matrix.
+
+    Only one block is copied at a time, so float32 and memory-mapped
+    matrices (or views of a wider buffer) are never copied whole.
+    """
+    step = max(1, chunk_bytes // max(1, matrix.dtype.itemsize * matrix.shape[1]))
+    for start in range(0, matrix.shape[0], step):
+        yield start, np.ascontiguousarray(matrix[start:start + step])
+
+
+def stream_npz(path, matrix, columns):
+    """Write matrix columns as an .npz archive (one entry per column) in row blocks"""
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(path) or '.') as scratch:
+        # One pass over the rows fills a memory-mapped .npy file per column
+        parts = [os.path.join(scratch, f"{i}.npy") for i in range(len(columns))]
+        arrays = [np.lib.format.open_memmap(part, mode='w+', dtype=matrix.dtype, shape=(matrix.shape[0],))
+                  for part in parts]
+        for start, block in row_blocks(matrix):
+            for i, array in enumerate(arrays):
+                array[start:start + len(block)] = block[:, i]
+        for array in arrays:
+            array.flush()
+        del arrays
+        # Stored entries, as np.savez writes them
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED, allowZip64=True) as archive:
+            for part, column in zip(parts, columns):
+                archive.write(part, f"{column}.npy")
+
+
+def stream_csv(path, matrix, columns):
+    """Write matrix columns as CSV in row blocks"""
+    with open(path, 'w', newline='') as f:
+        for start, block in row_blocks(matrix):
+            pd.DataFrame(block, columns=columns).to_csv(f, header=start == 0, index=False)
+
+
+# Matrix formats written in row blocks; the others build the whole table
+MATRIX_STREAMERS = {
+    'npz': stream_npz,
+    'csv': stream_csv,
+}
+
+
+# Format name -> (file extension, writer(path, table), needs pyarrow)
+WRITERS = {
+    'npz': ('.npz', write_npz, False),
+    'parquet': ('.parquet', write_parquet, True),
+    'feather': ('.feather', write_feather, True),
+    'csv': ('.csv', write_csv, False),
+    'xlsx': ('.xlsx', write_xlsx, False),
+}
+
+
+def matrix_key(matrix):
+    """
+    Content hash of a matrix, used to write each mode matrix only once.
+
+    The matrix is hashed in row blocks, so it is never copied whole.
+
+    Args:
+        matrix (np.ndarray): Matrix to hash
+
+    Returns:
+        str: Hex digest over the shape, dtype and values
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str((matrix.shape, matrix.dtype.str)).encode())
+    for _, block in row_blocks(matrix):
+        digest.update(block.data)
+    return digest.hexdigest()
+
+
+class ResultExporter:
+    """
+    Writes optimisation results and the mode matrix in a chosen format.
+
+    Tables are passed column-wise (name -> 1-D array) to one of the
+    WRITERS. Parquet and Feather need pyarrow; without it those formats
+    fall back to NPZ. The mode matrix is identical for every method run
+    on a dataset, so it is written once per content hash and reused
+    afterwards. With asynchronous=True writes run on a background thread
+    and the export calls return futures (see wait); a failed background
+    write is logged and passed to error_callback(exception) if it is set.
+    """
+
+    def __init__(self, results_format='xlsx', matrix_format='npz', output_dir='.', asynchronous=False):
+        self.results_format = self._check_format(results_format)
+        self.matrix_format = self._check_format(matrix_format)
+        self.output_dir = output_dir
+        self.asynchronous = asynchronous
+        self._executor = None
+        self.pending = []
+        self.error_callback = None
+
+    @staticmethod
+    def _check_format(fmt):
+        if fmt not in WRITERS:
+            raise ValueError(f"Unknown export format '{fmt}', expected one of {', '.join(WRITERS)}")
+        if WRITERS[fmt][2] and not _has_pyarrow():
+            print(f"pyarrow is not installed, exporting {fmt} data as npz instead")
+            return 'npz'
+        return fmt
+
+    def _path(self, name, fmt):
+        return os.path.join(self.output_dir, name + WRITERS[fmt][0])
+
+    def _write(self, path, fmt, table, label, writer=None):
+        # Write to a temporary file first so readers never see a partial export
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp{WRITERS[fmt][0]}"
+        try:
+            os.makedirs(self.output_dir or '.', exist_ok=True)
+            (writer or WRITERS[fmt][1])(tmp, table)
+            os.replace(tmp, path)
+        except Exception as e:
+            with _written_lock:
+                _written.discard(path)
+            print(f"Error saving {label} to {path}: {str(e)}")
+            raise
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        print(f"Saved {label} to {path}")
+        return path
+
+    def _submit(self, *args):
+        if not self.asynchronous:
+            return self._write(*args)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1)
+        job = self._executor.submit(self._write, *args)
+        job.add_done_callback(self._report_failure)
+        self.pending.append(job)
+        return job
+
+    def _report_failure(self, job):
+        # Nobody may wait on the future, so failures are passed on here
+        if job.cancelled() or job.exception() is None:
+            return
+        if self.error_callback is not None:
+            self.error_callback(job.exception())
+
+    def export_table(self, table, name, fmt=None, label='table'):
+        """
+        Write a column-wise table.
+
+        Args:
+            table (dict): Column name -> 1-D array
+            name (str): File name without extension
+            fmt (str): Format (defaults to results_format)
+            label (str): Description used in the log message
+
+        Returns:
+            str or Future: Written path (a future when asynchronous)
+        """
+        fmt = self.results_format if fmt is None else self._check_format(fmt)
+        return self._submit(self._path(name, fmt), fmt, table, label)
+
+    def export_results(self, results, name):
+        """
+        Write the selected sensors, their contributions and coordinates.
+
+        Args:
+            results (dict): Results with 'POS', 'Ed' and 'COO'
+            name (str): File name without extension
+
+        Returns:
+            str or Future: Written path (a future when asynchronous)
+        """
+        table = {
+            'Node': np.asarray(results['POS']),
+            'Contribution': np.asarray(results['Ed']),
+            'X (mm)': results['COO'][:, 0],
+            'Y (mm)': results['COO'][:, 1],
+            'Z (mm)': results['COO'][:, 2]
+        }
+        return self.export_table(table, name, label='results')
+
+    def export_matrix(self, matrix, name, columns=None):
+        """
+        Write a matrix once per content, skipping copies that already exist.
+
+        Args:
+            matrix (np.ndarray): Matrix to write (n_rows x n_columns)
+            name (str): File name prefix; the content hash is appended
+            columns (list): Column names (defaults to 0..n_columns-1)
+
+        Returns:
+            str or Future: Path of the matrix file (a future when asynchronous
+                and a write was needed)
+        """
+        path = self._path(f"{name}-{matrix_key(matrix)[:16]}", self.matrix_format)
+        with _written_lock:
+            if path in _written or os.path.exists(path):
+                _written.add(path)
+                print(f"Mode shape matrix already saved as {path}")
+                return path
+            _written.add(path)
+        if columns is None:
+            columns = [str(i) for i in range(matrix.shape[1])]
+        if self.matrix_format in MATRIX_STREAMERS:
+            # Streamed in row blocks without copying the matrix; mode matrices
+            # from the session store are read-only views, so a background
+            # write reads the same data
+            streamer = MATRIX_STREAMERS[self.matrix_format]
+            return self._submit(path, self.matrix_format, matrix, 'mode shape matrix',
+                                lambda tmp, matrix: streamer(tmp, matrix, columns))
+        # Columns are copied so later changes to the matrix do not race the write
+        table = {column: np.array(matrix[:, i]) for i, column in enumerate(columns)}
+        return self._submit(path, self.matrix_format, table, 'mode shape matrix')
+
+    def wait(self):
+        """
+        Wait for the asynchronous writes submitted so far.
+
+        Returns:
+            list: Written paths
+        """
+        jobs, self.pending = self.pending, []
+        return [job.result() for job in jobs]
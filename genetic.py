@@ -1,107 +1,450 @@
-import random
+import hashlib
+import time
+from collections import OrderedDict
 import numpy as np
-from scipy.linalg import eigh
+from efi import FisherFactor, GramFactor, log_det_batch, driving_point_residue, column_frequencies
+from instrument import span, count
+
+
+class FitnessCache:
+    """Bounded LRU cache of fitness values keyed by the selected index set"""
+
+    def __init__(self, max_size=100000):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(selection, method):
+        """Compact canonical key: 16-byte hash of the sorted indices and the method"""
+        digest = hashlib.blake2b(method.encode(), digest_size=16)
+        digest.update(np.sort(np.asarray(selection, dtype=np.int64)).tobytes())
+        return digest.digest()
+
+    def get(self, key):
+        """Return the cached fitness, or None on a miss"""
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Store a fitness value, evicting the least recently used entries"""
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """Return hit/miss statistics"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'size': len(self.entries),
+            'max_size': self.max_size
+        }
 
 
 class GeneticOptimizer:
-    def __init__(self, population_size=70, generations=200, mutation_rate=0.1, elite_size=2):
+    def __init__(self, population_size=70, generations=200, mutation_rate=0.1, elite_size=2,
+                 cache_size=100000, incremental=True, seed=None,
+                 n_islands=1, migration_interval=10, n_migrants=2, workers=None,
+                 stall_generations=None, tolerance=0.0, min_diversity=None, time_budget=None):
         self.population_size = population_size
         self.generations = generations
         self.mutation_rate = mutation_rate
         self.elite_size = elite_size
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        # Island model: n_islands populations of population_size evolve in
+        # parallel and exchange n_migrants elites every migration_interval
+        # generations (see islands.py)
+        self.n_islands = n_islands
+        self.migration_interval = migration_interval
+        self.n_migrants = n_migrants
+        self.workers = workers
+        # Stopping criteria (None disables): generations without a relative
+        # improvement above tolerance, population diversity floor, and a
+        # wall-clock budget in seconds
+        self.stall_generations = stall_generations
+        self.tolerance = tolerance
+        self.min_diversity = min_diversity
+        self.time_budget = time_budget
+        self.stop_reason = None
+        self.trace = []
+        # Called as callback(generation, generations, best_fitness) once per generation
+        self.callback = None
+        # Fitness memoisation; cache_size=0 disables it. Entries assume a
+        # fixed mode matrix, so clear the cache before scoring another one.
+        self.fitness_cache = FitnessCache(cache_size) if cache_size else None
+        # Swap children of scored chromosomes are scored from the parent's
+        # cached FIM (or, below n_modes sensors, Gram) factor with a rank-two update
+        self.incremental = incremental
+        self.factor_cache = OrderedDict()
+        self.swap_evaluations = 0
 
     def initialize_population(self, n_total, n_sensors):
-        """Initialize random population of sensor configurations"""
-        population = []
-        for _ in range(self.population_size):
-            # Create a random selection of sensor positions
-            chromosome = np.zeros(n_total, dtype=bool)
-            sensor_positions = np.random.choice(n_total, n_sensors, replace=False)
-            chromosome[sensor_positions] = True
-            population.append(chromosome)
+        """
+        Initialize random population of sensor configurations.
+        
+        Each chromosome is a sorted row of distinct node indices, so the
+        population is a single (population_size, n_sensors) int32 array.
+        
+        Raises:
+            ValueError: If there are more sensors than nodes
+        """
+        if n_sensors > n_total:
+            raise ValueError(f"Cannot place {n_sensors} sensors on {n_total} nodes")
+        # Rows are drawn without replacement, so near-full selections cost no redraws
+        population = np.empty((self.population_size, n_sensors), dtype=np.int32)
+        for row in population:
+            row[:] = self.rng.choice(n_total, n_sensors, replace=False)
+        population.sort(axis=1)
         return population
 
+    @staticmethod
+    def _duplicated(population):
+        duplicated = np.zeros(population.shape, dtype=bool)
+        duplicated[:, 1:] = population[:, 1:] == population[:, :-1]
+        return duplicated
+
     def fitness_efi(self, chromosome, mode_matrix):
         """Calculate fitness using EFI methodology"""
-        selected_modes = mode_matrix[chromosome]
-        fim = selected_modes @ selected_modes.T
-        eigenvals = eigh(fim, eigvals_only=True)
-        # Use determinant of FIM as fitness measure
-        return np.sum(np.log(eigenvals[eigenvals > 1e-10]))
+        return self.fitness_population([chromosome], mode_matrix, 'EFI')[0]
 
     def fitness_efi_dpr(self, chromosome, mode_matrix, frequencies):
         """Calculate fitness using EFI-DPR methodology"""
-        selected_modes = mode_matrix[chromosome]
+        return self.fitness_population([chromosome], mode_matrix, 'EFI-DPR', frequencies)[0]
+
+    def fitness_population(self, population, mode_matrix, method='EFI', frequencies=None, swaps=None, dpr=None):
+        """
+        Calculate the fitness of a whole population in one batched operation.
         
-        # Calculate DPR component
-        dpr = np.zeros(selected_modes.shape[0])
-        for i in range(selected_modes.shape[1]):
-            dpr += selected_modes[:, i]**2 / frequencies[i]
-        dpr_normalized = dpr / np.max(dpr)
+        Args:
+            population (np.ndarray): Chromosomes as rows of node indices
+            mode_matrix (np.ndarray): Mode shape matrix
+            method (str): 'EFI' or 'EFI-DPR'
+            frequencies (np.ndarray): Modal frequencies, one per mode (EFI-DPR only)
+            swaps (list): Optional (parent chromosome, removed node, added node) per
+                chromosome that is one swap away from a scored parent, else None
+            dpr (np.ndarray): Per-node DPR of mode_matrix (EFI-DPR only; computed
+                from frequencies for the selected rows only when not given)
         
-        # Calculate EFI component
-        fim = selected_modes @ selected_modes.T
-        eigenvals = eigh(fim, eigvals_only=True)
-        efi_score = np.sum(np.log(eigenvals[eigenvals > 1e-10]))
+        Returns:
+            np.ndarray: Fitness of each chromosome
+        """
+        selections = np.atleast_2d(population)
+        if selections.dtype == bool:
+            # Boolean node masks are converted to index rows
+            selections = np.array([np.flatnonzero(mask) for mask in selections])
+        keys = [FitnessCache.key(selection, method) for selection in selections]
+        fitness = np.empty(len(selections))
         
-        # Combine EFI and DPR scores
-        return efi_score * np.mean(dpr_normalized)
+        # Look up repeated chromosomes and score swap children incrementally;
+        # each distinct remaining chromosome is scored once
+        pending = {}
+        for i, key in enumerate(keys):
+            value = self.fitness_cache.get(key) if self.fitness_cache is not None else None
+            if value is None and swaps is not None and swaps[i] is not None:
+                value = self._swap_fitness(selections[i], key, swaps[i], mode_matrix, method, frequencies, dpr)
+                if value is not None and self.fitness_cache is not None:
+                    self.fitness_cache.put(key, value)
+            if value is not None:
+                fitness[i] = value
+            else:
+                pending.setdefault(key, []).append(i)
+        count('fitness.cache_hits', len(selections) - sum(len(rows) for rows in pending.values()))
+        if not pending:
+            return fitness
+        
+        # Gather the selected mode shapes as (pop, sensors, modes)
+        pending_keys = list(pending)
+        first = [pending[key][0] for key in pending_keys]
+        count('fitness.evaluations', len(pending_keys))
+        # float32 mode matrices are scored in float64
+        selected_modes = np.asarray(mode_matrix[selections[first]], dtype=np.float64)
+        selected_dpr = None
+        if method != 'EFI':
+            selected_dpr = (self._gathered_dpr(selected_modes, frequencies) if dpr is None
+                            else dpr[selections[first]])
+        scores = self._fitness_batch(selected_modes, method, pending_keys, selected_dpr)
+        
+        for key, score in zip(pending_keys, scores):
+            fitness[pending[key]] = score
+            if self.fitness_cache is not None:
+                self.fitness_cache.put(key, score)
+        return fitness
+
+    def _fitness_batch(self, selected_modes, method, keys, selected_dpr=None):
+        # Use determinant of FIM as fitness measure; with fewer sensors than
+        # mode columns the Gram matrix of the set is factorised instead
+        if self.incremental:
+            factor_type = FisherFactor if selected_modes.shape[1] >= selected_modes.shape[2] else GramFactor
+            efi_score, factors = factor_type.from_modes_batch(selected_modes)
+            for key, factor in zip(keys, factors):
+                self._store_factor(key, factor)
+        else:
+            efi_score = log_det_batch(selected_modes)
+        if method == 'EFI':
+            return efi_score
+        return efi_score * self._dpr_weight(selected_dpr)
+
+    @staticmethod
+    def _gathered_dpr(selected_modes, frequencies):
+        # DPR of gathered rows (..., sensors, columns), without the full matrix
+        inverse = 1.0 / column_frequencies(frequencies, selected_modes.shape[-1])
+        return np.square(selected_modes) @ inverse
+
+    @staticmethod
+    def _dpr_weight(selected_dpr):
+        # Mean DPR of each chromosome's sensors, normalised to its best sensor
+        selected_dpr = np.atleast_2d(selected_dpr)
+        dpr_normalized = selected_dpr / np.max(selected_dpr, axis=1, keepdims=True)
+        return np.mean(dpr_normalized, axis=1)
 
-    def select_parents(self, population, fitness_scores):
-        """Select parents using tournament selection"""
+    def _store_factor(self, key, factor):
+        if factor is None:
+            return
+        self.factor_cache[key] = factor
+        self.factor_cache.move_to_end(key)
+        # Parents only live for one generation
+        while len(self.factor_cache) > 2 * self.population_size:
+            self.factor_cache.popitem(last=False)
+
+    def _swap_fitness(self, selection, key, swap, mode_matrix, method, frequencies, dpr):
+        """Score a one-swap child from its parent's cached factor, or return None"""
+        parent, removed, added = swap
+        parent_factor = self.factor_cache.get(FitnessCache.key(parent, method))
+        if parent_factor is None:
+            return None
+        factor = parent_factor.swap(np.asarray(mode_matrix[removed], dtype=np.float64),
+                                    np.asarray(mode_matrix[added], dtype=np.float64))
+        if factor is None:
+            return None
+        self._store_factor(key, factor)
+        self.swap_evaluations += 1
+        count('fitness.swap_updates')
+        if method == 'EFI':
+            return factor.logdet
+        if dpr is None:
+            selected_dpr = self._gathered_dpr(np.asarray(mode_matrix[selection], dtype=np.float64), frequencies)
+        else:
+            selected_dpr = dpr[selection]
+        return factor.logdet * self._dpr_weight(selected_dpr)[0]
+
+    def select_parents(self, fitness_scores):
+        """Select parents using tournament selection, returning population row indices"""
         tournament_size = 3
-        parents = []
-        for _ in range(len(population) - self.elite_size):
-            tournament_indices = np.random.choice(len(population), tournament_size)
-            tournament_fitness = [fitness_scores[i] for i in tournament_indices]
-            winner_idx = tournament_indices[np.argmax(tournament_fitness)]
-            parents.append(population[winner_idx])
-        return parents
-
-    def crossover(self, parent1, parent2):
-        """Perform crossover while maintaining the same number of sensors"""
-        n_sensors = np.sum(parent1)
-        child = np.zeros_like(parent1)
-        
-        # Get indices where sensors are placed in both parents
-        parent1_indices = np.where(parent1)[0]
-        parent2_indices = np.where(parent2)[0]
-        
-        # Randomly select crossover point
-        crossover_point = random.randint(0, n_sensors)
-        
-        # Take sensors from both parents
-        selected_indices = np.concatenate([
-            parent1_indices[:crossover_point],
-            parent2_indices[crossover_point:]])
-        
-        # If we have too many or too few sensors, adjust randomly
-        while len(selected_indices) != n_sensors:
-            if len(selected_indices) > n_sensors:
-                selected_indices = np.random.choice(
-                    selected_indices, n_sensors, replace=False)
-            else:
-                available = np.setdiff1d(np.arange(len(parent1)), selected_indices)
-                additional = np.random.choice(
-                    available, n_sensors - len(selected_indices), replace=False)
-                selected_indices = np.concatenate([selected_indices, additional])
-        
-        child[selected_indices] = True
-        return child
-
-    def mutate(self, chromosome):
-        """Perform mutation while maintaining the same number of sensors"""
-        if random.random() < self.mutation_rate:
-            n_sensors = np.sum(chromosome)
-            sensor_positions = np.where(chromosome)[0]
-            non_sensor_positions = np.where(~chromosome)[0]
+        n_parents = len(fitness_scores) - self.elite_size
+        tournaments = self.rng.integers(0, len(fitness_scores), (n_parents, tournament_size))
+        winners = np.argmax(np.asarray(fitness_scores)[tournaments], axis=1)
+        return tournaments[np.arange(n_parents), winners]
+
+    def crossover(self, parents1, parents2):
+        """
+        Perform crossover on rows of parents while maintaining the same number of sensors.
+        
+        Each child takes the genes of parent 1 before a random crossover point
+        and those of parent 2 after it. Genes lost to duplicates are refilled
+        at random from the remaining genes of both parents, so no scan over
+        the full node range is needed.
+        """
+        n_children, n_sensors = parents1.shape
+        genes = np.concatenate([parents1, parents2], axis=1)
+        
+        # Randomly select crossover points; preferred genes get priority < 1
+        points = self.rng.integers(0, n_sensors + 1, n_children)
+        column = np.arange(n_sensors)
+        preferred = np.concatenate([column < points[:, None], column >= points[:, None]], axis=1)
+        priority = np.where(preferred, 0.0, 1.0) + self.rng.random(genes.shape)
+        
+        # Keep one copy of each gene, the one with the best priority
+        order = np.lexsort((priority, genes), axis=1)
+        genes = np.take_along_axis(genes, order, axis=1)
+        priority = np.take_along_axis(priority, order, axis=1)
+        priority[self._duplicated(genes)] = np.inf
+        
+        # Take the n_sensors best-priority genes
+        keep = np.argsort(priority, axis=1)[:, :n_sensors]
+        children = np.take_along_axis(genes, keep, axis=1)
+        children.sort(axis=1)
+        return children
+
+    def mutate(self, population, n_total):
+        """
+        Perform mutation on rows of the population while maintaining the same number of sensors.
+        
+        Returns:
+            tuple: (mutated population, mutated row indices, removed nodes, added nodes)
+        """
+        population = population.copy()
+        n_rows, n_sensors = population.shape
+        if n_sensors >= n_total:
+            empty = np.array([], dtype=np.int32)
+            return population, empty, empty, empty
+        
+        mutated = np.flatnonzero(self.rng.random(n_rows) < self.mutation_rate)
+        
+        # Randomly select one sensor to move per mutated row and a free node
+        positions = self.rng.integers(0, n_sensors, len(mutated))
+        added = self.rng.integers(0, n_total, len(mutated), dtype=np.int32)
+        occupied = np.any(population[mutated] == added[:, None], axis=1)
+        while occupied.any():
+            added[occupied] = self.rng.integers(0, n_total, occupied.sum(), dtype=np.int32)
+            occupied = np.any(population[mutated] == added[:, None], axis=1)
+        
+        # Move the sensors
+        removed = population[mutated, positions]
+        population[mutated, positions] = added
+        population[mutated] = np.sort(population[mutated], axis=1)
+        return population, mutated, removed, added
+
+    def next_generation(self, population, fitness_scores, n_total):
+        """
+        Build the next generation with elitism, tournament selection, crossover and mutation.
+        
+        Returns:
+            tuple: (new population, swaps) where swaps holds (parent, removed node,
+                added node) for children one swap away from a scored parent, else None
+        """
+        with span('selection'):
+            # Elitism: keep best solutions
+            elite = population[np.argsort(fitness_scores)[len(population) - self.elite_size:]]
+            
+            # Select parents and pair them with distinct partners
+            parents = population[self.select_parents(fitness_scores)]
+            n_children = self.population_size - len(elite)
+            first = self.rng.integers(0, len(parents), n_children)
+            second = (first + self.rng.integers(1, len(parents), n_children)) % len(parents)
+        
+        # Create offspring
+        with span('crossover'):
+            children = self.crossover(parents[first], parents[second])
+            same_as_first = np.all(children == parents[first], axis=1)
+            same_as_second = np.all(children == parents[second], axis=1)
+        with span('mutation'):
+            children, mutated, removed, added = self.mutate(children, n_total)
+        
+        # A crossover child equal to a parent is one swap away from it after
+        # mutation, so it can be scored incrementally
+        swaps = [None] * self.population_size
+        for row, removed_node, added_node in zip(mutated, removed, added):
+            if same_as_first[row]:
+                swaps[len(elite) + row] = (parents[first[row]], removed_node, added_node)
+            elif same_as_second[row]:
+                swaps[len(elite) + row] = (parents[second[row]], removed_node, added_node)
+        
+        return np.concatenate([elite, children]), swaps
+
+    def diversity(self, population, n_total):
+        """
+        Population diversity from 0 (all chromosomes identical) to 1 (as many
+        distinct genes as the population and node count allow).
+        """
+        n_rows, n_sensors = population.shape
+        most_distinct = min(n_rows * n_sensors, n_total) - n_sensors
+        if most_distinct <= 0:
+            return 0.0
+        return (np.unique(population).size - n_sensors) / most_distinct
+
+    def improved(self, fitness, best_fitness):
+        """Whether fitness beats best_fitness by more than the relative tolerance"""
+        if not np.isfinite(best_fitness):
+            return fitness > best_fitness
+        return fitness > best_fitness + self.tolerance * abs(best_fitness)
+
+    def check_stop(self, stall, diversity, elapsed):
+        """Return the reason to stop early, or None to continue"""
+        if self.time_budget is not None and elapsed >= self.time_budget:
+            return 'time_budget'
+        if self.stall_generations is not None and stall >= self.stall_generations:
+            return 'stall'
+        if self.min_diversity is not None and diversity < self.min_diversity:
+            return 'diversity'
+        return None
+
+    def evolve(self, population, mode_matrix, method='EFI', frequencies=None, generations=None, verbose=True,
+               dpr=None):
+        """
+        Run the evolution loop on a population until the generation limit or a stopping criterion.
+        
+        The reason the loop ended is stored in self.stop_reason ('generations',
+        'stall', 'diversity' or 'time_budget') and one record per generation
+        (best and mean fitness, diversity, elapsed seconds) in self.trace.
+        
+        Args:
+            population (np.ndarray): Initial population
+            mode_matrix (np.ndarray): Mode shape matrix
+            method (str): 'EFI' or 'EFI-DPR'
+            frequencies (np.ndarray): Modal frequencies, one per mode (EFI-DPR only)
+            generations (int): Number of generations (defaults to self.generations)
+            verbose (bool): Print progress every 10 generations
+            dpr (np.ndarray): Per-node DPR of mode_matrix (EFI-DPR only; computed
+                once from frequencies when not given)
+        
+        Returns:
+            tuple: (final population, its fitness, best chromosome, best fitness)
+        """
+        generations = self.generations if generations is None else generations
+        n_total = mode_matrix.shape[0]
+        # DPR is fixed per node, so fitness only gathers it by index
+        if method != 'EFI' and dpr is None:
+            dpr = driving_point_residue(mode_matrix, frequencies)
+        best_fitness = float('-inf')
+        best_chromosome = None
+        swaps = None
+        stall = 0
+        start = time.perf_counter()
+        self.trace = []
+        self.stop_reason = 'generations'
+        
+        for generation in range(generations + 1):
+            # Calculate fitness for the whole population at once
+            with span('fitness'):
+                fitness_scores = self.fitness_population(population, mode_matrix, method, frequencies, swaps, dpr)
+            
+            # Track best solution
+            max_fitness = np.max(fitness_scores)
+            stall = 0 if self.improved(max_fitness, best_fitness) else stall + 1
+            if max_fitness > best_fitness:
+                best_fitness = max_fitness
+                best_chromosome = population[np.argmax(fitness_scores)].copy()
+            
+            diversity = self.diversity(population, n_total)
+            elapsed = time.perf_counter() - start
+            self.trace.append({
+                'generation': generation,
+                'best_fitness': best_fitness,
+                'mean_fitness': float(np.mean(fitness_scores)),
+                'diversity': diversity,
+                'elapsed': elapsed
+            })
             
-            # Randomly select one sensor to move
-            sensor_to_move = np.random.choice(sensor_positions)
-            new_position = np.random.choice(non_sensor_positions)
+            if generation == generations:
+                break
+            reason = self.check_stop(stall, diversity, elapsed)
+            if reason is not None:
+                self.stop_reason = reason
+                if verbose:
+                    print(f"Stopping at generation {generation} ({reason}): Best fitness = {best_fitness:.4f}")
+                break
+            if verbose and generation % 10 == 0:
+                print(f"Generation {generation}: Best fitness = {best_fitness:.4f}")
+            if self.callback is not None:
+                self.callback(generation, generations, best_fitness)
             
-            # Move the sensor
-            chromosome[sensor_to_move] = False
-            chromosome[new_position] = True
+            # Elitism, selection, crossover and mutation on the whole population
+            population, swaps = self.next_generation(population, fitness_scores, n_total)
         
-        return chromosome
\ No newline at end of file
+        return population, fitness_scores, best_chromosome, best_fitness
@@ -0,0 +1,94 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+
+
+def read_column(path, column):
+    """
+    Read a single named column from the first sheet of an Excel file.
+
+    The workbook is opened read-only and streamed row by row, so no
+    DataFrame is built. Files openpyxl cannot stream fall back to pandas.
+
+    Args:
+        path (str): Excel file path
+        column (str): Header of the column to read
+
+    Returns:
+        np.ndarray: Column values as floats (empty cells become NaN)
+    """
+    try:
+        from openpyxl import load_workbook
+        workbook = load_workbook(path, read_only=True, data_only=True)
+    except Exception:
+        return pd.read_excel(path, usecols=[column])[column].to_numpy(dtype=float)
+
+    try:
+        sheet = workbook.worksheets[0]
+        header = next(sheet.iter_rows(max_row=1, values_only=True), ())
+        if column not in header:
+            raise KeyError(f"Column '{column}' not found in {path}")
+        col = header.index(column) + 1
+        values = [row[0] for row in sheet.iter_rows(min_row=2, min_col=col, max_col=col, values_only=True)]
+    finally:
+        workbook.close()
+
+    # Trailing blank rows are dropped, as pandas does
+    while values and values[-1] is None:
+        values.pop()
+    return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+
+def read_columns(paths, column, out, out_columns=None, max_workers=None):
+    """
+    Read one column from each file straight into a preallocated matrix.
+
+    Files are parsed concurrently in a process pool; each worker returns a
+    single 1-D array, which is copied into its column of ``out``.
+
+    Args:
+        paths (list): Excel file paths
+        column (str): Header of the column to read from every file
+        out (np.ndarray): Preallocated matrix (n_rows x n_columns)
+        out_columns (list): Column of ``out`` for each path (defaults to 0..len(paths)-1)
+        max_workers (int): Number of worker processes (defaults to the CPU count)
+
+    Returns:
+        np.ndarray: The filled ``out`` matrix
+    """
+    if out_columns is None:
+        out_columns = list(range(len(paths)))
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = min(max_workers, len(paths))
+
+    def store(path, target, values):
+        if len(values) != out.shape[0]:
+            raise ValueError(f"{path} has {len(values)} rows, expected {out.shape[0]}")
+        out[:, target] = values
+
+    if max_workers <= 1:
+        for i, (path, target) in enumerate(zip(paths, out_columns)):
+            print(f"Reading mode file {i+1}/{len(paths)}: {path}")
+            try:
+                store(path, target, read_column(path, column))
+            except Exception as e:
+                print(f"Error reading mode file {path}: {str(e)}")
+                raise
+        return out
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(read_column, path, column): (path, target)
+                   for path, target in zip(paths, out_columns)}
+        for i, future in enumerate(as_completed(futures)):
+            path, target = futures[future]
+            try:
+                store(path, target, future.result())
+            except Exception as e:
+                print(f"Error reading mode file {path}: {str(e)}")
+                for pending in futures:
+                    pending.cancel()
+                raise
+            print(f"Read mode file {i+1}/{len(paths)}: {path}")
+    return out
@@ -0,0 +1,219 @@
+"""
+Stage timing, counters and profiling for optimisation runs.
+
+Code is instrumented with hierarchical spans and counters:
+
+    from instrument import span, count
+
+    with span('fitness'):
+        count('fitness.evaluations', len(population))
+        ...
+
+    @timed('plotting')
+    def render(...):
+        ...
+
+Spans nest per thread; each is recorded under its path (for example
+'ga/fitness') with its call count and total, min and max
+time. Recording is off by default, and then span() returns a shared
+no-op context manager and count() returns at once, so instrumented code
+runs at full speed. Call enable() to record, profile() to run a block
+under cProfile, and export_json() to write the report. Setting the
+OSP_INSTRUMENT environment variable to a file name enables recording at
+import and writes the report there when the process exits.
+"""
+import atexit
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('recorder', 'name', 'start')
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.recorder._stack().append(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        stack = self.recorder._stack()
+        self.recorder._add('/'.join(stack), elapsed)
+        stack.pop()
+        return False
+
+
+class Recorder:
+    """Collects span timings, counters and profiles (see the module docstring)"""
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.spans = {}
+        self.counters = {}
+        self.profiles = []
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _add(self, path, elapsed):
+        with self._lock:
+            entry = self.spans.get(path)
+            if entry is None:
+                self.spans[path] = [1, elapsed, elapsed, elapsed]
+            else:
+                entry[0] += 1
+                entry[1] += elapsed
+                entry[2] = min(entry[2], elapsed)
+                entry[3] = max(entry[3], elapsed)
+
+    def span(self, name):
+        """
+        Time a block as a child of the enclosing span.
+
+        Args:
+            name (str): Span name
+
+        Returns:
+            Context manager timing the block (a no-op when disabled)
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def count(self, name, n=1):
+        """
+        Add n to a counter.
+
+        Args:
+            name (str): Counter name (e.g. 'lapack.eigh')
+            n (int): Amount to add
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    @contextmanager
+    def profile(self, name='profile', top=30, path=None):
+        """
+        Run a block under cProfile when recording is enabled.
+
+        Args:
+            name (str): Label of the profile in the report
+            top (int): Number of functions (by cumulative time) kept in the report
+            path (str): Optional file for the raw pstats data
+        """
+        if not self.enabled:
+            yield
+            return
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            if path is not None:
+                profiler.dump_stats(path)
+            stats = pstats.Stats(profiler, stream=io.StringIO())
+            functions = []
+            for (filename, line, function), (_, calls, own, cumulative, _) in stats.stats.items():
+                functions.append({'function': f"{os.path.basename(filename)}:{line}({function})",
+                                  'calls': calls, 'own_seconds': own, 'cumulative_seconds': cumulative})
+            functions.sort(key=lambda entry: entry['cumulative_seconds'], reverse=True)
+            with self._lock:
+                self.profiles.append({'name': name, 'functions': functions[:top]})
+
+    def report(self):
+        """
+        Return the recorded data.
+
+        Returns:
+            dict: 'spans' (path, count, total/mean/min/max seconds, ordered by
+                path), 'counters' and 'profiles'
+        """
+        with self._lock:
+            spans = [{'path': path, 'count': n, 'total_seconds': total, 'mean_seconds': total / n,
+                      'min_seconds': low, 'max_seconds': high}
+                     for path, (n, total, low, high) in sorted(self.spans.items())]
+            return {'spans': spans, 'counters': dict(self.counters), 'profiles': list(self.profiles)}
+
+    def export_json(self, path):
+        """Write the report to a JSON file"""
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+        print(f"Instrumentation report saved to {path}")
+
+    def reset(self):
+        with self._lock:
+            self.spans.clear()
+            self.counters.clear()
+            self.profiles.clear()
+
+
+recorder = Recorder()
+span = recorder.span
+count = recorder.count
+profile = recorder.profile
+report = recorder.report
+export_json = recorder.export_json
+reset = recorder.reset
+
+
+def timed(name):
+    """
+    Decorator recording every call of a function as a span.
+
+    Args:
+        name (str): Span name
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not recorder.enabled:
+                return func(*args, **kwargs)
+            with _Span(recorder, name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def enable():
+    recorder.enabled = True
+
+
+def disable():
+    recorder.enabled = False
+
+
+if os.environ.get('OSP_INSTRUMENT'):
+    enable()
+    atexit.register(export_json, os.environ['OSP_INSTRUMENT'])
@@ -0,0 +1,166 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from genetic import GeneticOptimizer
+from efi import driving_point_residue
+
+# Per-process views of the shared mode matrix and DPR, set up by _attach
+_shared = {}
+
+
+def _dpr_offset(mode_matrix_bytes):
+    # The DPR vector follows the mode matrix, aligned for float64
+    return -(-mode_matrix_bytes // 8) * 8
+
+
+def _attach(name, shape, dtype, n_dpr):
+    """Pool initializer: map the shared mode matrix (and DPR) without copying them"""
+    block = shared_memory.SharedMemory(name=name)
+    _shared['block'] = block
+    mode_matrix = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    mode_matrix.flags.writeable = False
+    _shared['mode_matrix'] = mode_matrix
+    _shared['dpr'] = None
+    if n_dpr:
+        dpr = np.ndarray((n_dpr,), dtype=np.float64, buffer=block.buf, offset=_dpr_offset(mode_matrix.nbytes))
+        dpr.flags.writeable = False
+        _shared['dpr'] = dpr
+
+
+def _evolve_island(task):
+    """Evolve one island for one migration interval"""
+    params, rng, population, generations, method, frequencies = task
+    # A fresh optimizer per interval keeps the result independent of which
+    # worker process runs the island
+    ga = GeneticOptimizer(**params)
+    ga.rng = rng
+    population, fitness, best, best_fitness = ga.evolve(
+        population, _shared['mode_matrix'], method, frequencies, generations, verbose=False,
+        dpr=_shared['dpr'])
+    return population, fitness, best, best_fitness, ga.rng, ga.stop_reason, ga.trace
+
+
+def run_islands(params, mode_matrix, n_sensors, method='EFI', frequencies=None, callback=None, dpr=None):
+    """
+    Island-model genetic optimization in a process pool.
+
+    Each island evolves its own population in a worker process. The mode
+    matrix (and the per-node DPR for EFI-DPR) is placed in shared memory
+    once and mapped read-only by every worker, so it is never pickled per
+    task. Every migration_interval
+    generations each island's n_migrants best chromosomes replace the
+    worst chromosomes of the next island (ring topology). Island random
+    streams are spawned from the seed, so runs are reproducible per seed.
+    Stall and diversity criteria are checked on the merged trace at each
+    migration; the time budget is also enforced inside the workers.
+
+    Args:
+        params (dict): GeneticOptimizer keyword arguments
+        mode_matrix (np.ndarray): Mode shape matrix
+        n_sensors (int): Number of sensors per chromosome
+        method (str): 'EFI' or 'EFI-DPR'
+        frequencies (np.ndarray): Modal frequencies, one per mode (EFI-DPR only)
+        callback (callable): Optional callback(generation, generations, best_fitness)
+            called after every migration interval
+        dpr (np.ndarray): Per-node DPR of mode_matrix (EFI-DPR only; computed
+            once from frequencies when not given)
+
+    Returns:
+        tuple: (best chromosome, best fitness, stop reason, per-generation trace)
+    """
+    ga = GeneticOptimizer(**params)
+    # Only the wall-clock budget is applied per island
+    island_params = dict(params, stall_generations=None, min_diversity=None)
+    n_islands = ga.n_islands
+    rngs = [np.random.default_rng(seed) for seed in np.random.SeedSequence(ga.seed).spawn(n_islands)]
+    populations = []
+    for rng in rngs:
+        ga.rng = rng
+        populations.append(ga.initialize_population(mode_matrix.shape[0], n_sensors))
+
+    if method != 'EFI' and dpr is None:
+        dpr = driving_point_residue(mode_matrix, frequencies)
+    n_dpr = 0 if dpr is None else len(dpr)
+    block = shared_memory.SharedMemory(create=True, size=max(_dpr_offset(mode_matrix.nbytes) + 8 * n_dpr, 1))
+    try:
+        # Copied straight into the block; store views need no contiguous copy first
+        np.ndarray(mode_matrix.shape, dtype=mode_matrix.dtype, buffer=block.buf)[:] = mode_matrix
+        if n_dpr:
+            np.ndarray((n_dpr,), dtype=np.float64, buffer=block.buf, offset=_dpr_offset(mode_matrix.nbytes))[:] = dpr
+        workers = min(n_islands, ga.workers or os.cpu_count() or 1)
+        print(f"Running {n_islands} islands on {workers} worker processes...")
+
+        best_chromosome = None
+        best_fitness = float('-inf')
+        stop_reason = 'generations'
+        trace = []
+        stall = 0
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach,
+                                 initargs=(block.name, mode_matrix.shape, mode_matrix.dtype, n_dpr)) as pool:
+            done = 0
+            # At least one interval runs, so generations=0 still scores the
+            # initial populations
+            while True:
+                generations = min(ga.migration_interval, ga.generations - done)
+                if ga.time_budget is not None:
+                    island_params['time_budget'] = ga.time_budget - (time.perf_counter() - start)
+                tasks = [(island_params, rng, population, generations, method, frequencies)
+                         for rng, population in zip(rngs, populations)]
+                results = list(pool.map(_evolve_island, tasks))
+                
+                populations = [result[0] for result in results]
+                fitness = [result[1] for result in results]
+                rngs = [result[4] for result in results]
+                for _, _, best, island_fitness, _, _, _ in results:
+                    if island_fitness > best_fitness:
+                        best_fitness = island_fitness
+                        best_chromosome = best
+                
+                # Merge the island traces; the first record of a later interval
+                # re-scores the population the previous interval ended with
+                island_traces = [result[6] for result in results]
+                first = 0 if done == 0 else 1
+                for step in range(first, max(len(t) for t in island_traces)):
+                    records = [t[min(step, len(t) - 1)] for t in island_traces]
+                    generation_best = max(record['best_fitness'] for record in records)
+                    previous = trace[-1]['best_fitness'] if trace else float('-inf')
+                    stall = 0 if ga.improved(generation_best, previous) else stall + 1
+                    trace.append({
+                        'generation': done + step,
+                        'best_fitness': max(generation_best, previous),
+                        'mean_fitness': float(np.mean([record['mean_fitness'] for record in records])),
+                        'diversity': float(np.mean([record['diversity'] for record in records])),
+                        'elapsed': time.perf_counter() - start
+                    })
+                done = trace[-1]['generation']
+                print(f"Generation {done}: Best fitness = {best_fitness:.4f} "
+                      f"(islands: {', '.join(f'{result[3]:.4f}' for result in results)})")
+                if callback is not None and generations:
+                    callback(done, ga.generations, best_fitness)
+                
+                if any(result[5] == 'time_budget' for result in results):
+                    stop_reason = 'time_budget'
+                    break
+                reason = ga.check_stop(stall, trace[-1]['diversity'], trace[-1]['elapsed'])
+                if reason is not None:
+                    stop_reason = reason
+                    break
+                if done >= ga.generations:
+                    break
+                
+                # Ring migration: elites of island i replace the worst of island i+1
+                if ga.n_migrants > 0:
+                    migrants = [population[np.argsort(scores)[-ga.n_migrants:]]
+                                for population, scores in zip(populations, fitness)]
+                    for i in range(n_islands):
+                        target = (i + 1) % n_islands
+                        worst = np.argsort(fitness[target])[:ga.n_migrants]
+                        populations[target][worst] = migrants[i]
+    finally:
+        block.close()
+        block.unlink()
+
+    return best_chromosome, best_fitness, stop_reason, trace
@@ -1,10 +1,18 @@
-import random
 import numpy as np
 from base import SensorOptimizer
 from genetic import GeneticOptimizer
-from scipy.linalg import eigh
+from islands import run_islands
+from efi import leverage
+from instrument import timed
 
 class SensorOptimizer(SensorOptimizer):  # Inherits from existing SensorOptimizer
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Keyword arguments for GeneticOptimizer (population_size, seed, n_islands, ...)
+        self.ga_params = {}
+        self.ga_report = None
+
+    @timed('ga')
     def genetic_optimization(self, method='EFI'):
         """
         Perform genetic algorithm optimization for sensor placement.
@@ -15,68 +23,59 @@ class SensorOptimizer(SensorOptimizer):  # Inherits from existing SensorOptimize
         Returns:
             tuple: (selected_indices, final_contributions)
         """    
-        ga = GeneticOptimizer()
-        n_total = len(self.nodes)
-        
-        # Initialize population
-        population = ga.initialize_population(n_total, self.target_sensors)
+        # With a screened candidate pool the GA searches its rows and the
+        # selection is mapped back to node indices afterwards
+        mode_matrix = self.Main_Mat
+        # Per-node DPR is computed once and gathered by the GA fitness
+        dpr = None if method == 'EFI' else self.calculate_dpr()
+        if self.candidates is not None:
+            mode_matrix = np.ascontiguousarray(self.Main_Mat[self.candidates])
+            dpr = None if dpr is None else dpr[self.candidates]
+            print(f"GA searching {len(self.candidates)} screened candidate nodes")
         
-        best_fitness = float('-inf')
-        best_chromosome = None
+        ga = GeneticOptimizer(**self.ga_params)
+        ga.callback = lambda generation, generations, best_fitness: self.report_progress(
+            f'GA-{method}', generation / generations)
         
-        # Evolution loop
-        for generation in range(ga.generations):
-            # Calculate fitness for each chromosome
-            fitness_scores = []
-            for chromosome in population:
-                if method == 'EFI':
-                    fitness = ga.fitness_efi(chromosome, self.Main_Mat)
-                else:  # EFI-DPR
-                    fitness = ga.fitness_efi_dpr(chromosome, self.Main_Mat, self.modal_frequencies)
-                fitness_scores.append(fitness)
-            
-            # Track best solution
-            max_fitness = max(fitness_scores)
-            if max_fitness > best_fitness:
-                best_fitness = max_fitness
-                best_chromosome = population[np.argmax(fitness_scores)]
-            
-            if generation % 10 == 0:
-                print(f"Generation {generation}: Best fitness = {best_fitness:.4f}")
-            
-            # Elitism: keep best solutions
-            elite_indices = np.argsort(fitness_scores)[-ga.elite_size:]
-            elite = [population[i] for i in elite_indices]
+        if ga.n_islands > 1:
+            best_chromosome, best_fitness, stop_reason, trace = run_islands(
+                self.ga_params, mode_matrix, self.target_sensors, method, self.modal_frequencies,
+                callback=ga.callback, dpr=dpr)
+        else:
+            population = ga.initialize_population(len(mode_matrix), self.target_sensors)
+            _, _, best_chromosome, best_fitness = ga.evolve(
+                population, mode_matrix, method, self.modal_frequencies, dpr=dpr)
+            stop_reason, trace = ga.stop_reason, ga.trace
             
-            # Select parents and create new population
-            parents = ga.select_parents(population, fitness_scores)
-            new_population = elite.copy()
-            
-            # Create offspring
-            while len(new_population) < ga.population_size:
-                parent1, parent2 = random.sample(parents, 2)
-                child = ga.crossover(parent1, parent2)
-                child = ga.mutate(child)
-                new_population.append(child)
-            
-            population = new_population
+            if ga.fitness_cache is not None:
+                stats = ga.fitness_cache.stats()
+                print(f"Fitness cache: {stats['hits']} hits, {stats['misses']} misses "
+                      f"({stats['hit_rate']:.1%} hit rate, {stats['size']} entries)")
+            if ga.incremental:
+                print(f"Incremental swap evaluations: {ga.swap_evaluations}")
+        
+        # Keep why the run stopped and its per-generation fitness trace
+        self.ga_report = {
+            'stop_reason': stop_reason,
+            'generations': trace[-1]['generation'] if trace else 0,
+            'best_fitness': best_fitness,
+            'trace': trace
+        }
+        print(f"GA stopped after {self.ga_report['generations']} generations ({stop_reason})")
         
         # Get final selected indices and calculate contributions
-        selected_indices = np.where(best_chromosome)[0]
+        selected_indices = best_chromosome.astype(np.intp)
+        if self.candidates is not None:
+            selected_indices = self.candidates[selected_indices]
         
         # Calculate final contributions based on method
+        selected_modes = self.Main_Mat[selected_indices]
         if method == 'EFI':
-            selected_modes = self.Main_Mat[selected_indices]
-            fim = selected_modes @ selected_modes.T
-            _, eigenvects = eigh(fim)
-            contributions = np.sum(eigenvects**2, axis=1)
+            contributions = leverage(selected_modes)
         else:  # EFI-DPR
-            selected_modes = self.Main_Mat[selected_indices]
-            fim = selected_modes @ selected_modes.T
-            _, eigenvects = eigh(fim)
-            dpr = self.calculate_dpr(selected_modes)
+            dpr = self.calculate_dpr()[selected_indices]
             dpr_normalized = dpr / np.max(dpr)
-            contributions = np.sum(eigenvects**2, axis=1) * dpr_normalized
+            contributions = leverage(selected_modes) * dpr_normalized
         
         return selected_indices, contributions
 
@@ -98,17 +97,22 @@ class SensorOptimizer(SensorOptimizer):  # Inherits from existing SensorOptimize
             if self.Main_Mat is None:
                 self.prepare_displacement_data()
             
+            self.report_progress(f'GA-{method}', 0.0)
+            
             # Plot initial positions
             self.plot_nodes(self.nodes, "Initial Node Positions")
             
             # Run genetic optimization
             selected_indices, contributions = self.genetic_optimization(method)
+            self.report_progress(f'GA-{method}', 1.0)
             
             # Store results
             results = {
                 'POS': self.POS[selected_indices],
                 'COO': self.nodes[selected_indices],
-                'Ed': contributions
+                'Ed': contributions,
+                'stop_reason': self.ga_report['stop_reason'],
+                'trace': self.ga_report['trace']
             }
             
             # Plot final positions
@@ -0,0 +1,51 @@
+import numpy as np
+
+# Default number of background nodes drawn in node plots
+MAX_PLOT_POINTS = 20000
+
+
+def downsample_nodes(nodes, max_points=MAX_PLOT_POINTS, iterations=8):
+    """
+    Spatially downsample a node cloud for plotting.
+
+    Nodes are binned on a uniform voxel grid and one node is kept per
+    occupied voxel. The voxel size is found by bisection so that about
+    max_points voxels are occupied, which keeps the shape of the mesh
+    while bounding the number of points drawn.
+
+    Args:
+        nodes (np.ndarray): Node coordinates (n_nodes x 3)
+        max_points (int): Target number of nodes (None keeps every node)
+        iterations (int): Bisection steps on the voxel size
+
+    Returns:
+        np.ndarray: Sorted indices of the kept nodes
+    """
+    n_nodes = len(nodes)
+    if max_points is None or n_nodes <= max_points:
+        return np.arange(n_nodes)
+
+    origin = nodes.min(axis=0)
+    extent = np.max(nodes.max(axis=0) - origin)
+    if extent <= 0:
+        return np.arange(min(n_nodes, max_points))
+
+    def occupied(size):
+        cells = np.floor((nodes - origin) / size).astype(np.int64)
+        # One integer key per voxel so np.unique works on a flat array
+        dims = cells.max(axis=0) + 1
+        keys = (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+        _, first = np.unique(keys, return_index=True)
+        return first
+
+    # Larger voxels hold more nodes each, so the occupied count falls with size
+    small, large = extent / max_points, extent
+    keep = occupied(large)
+    for _ in range(iterations):
+        size = np.sqrt(small * large)
+        first = occupied(size)
+        if len(first) > max_points:
+            small = size
+        else:
+            large, keep = size, first
+    return np.sort(keep)
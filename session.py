@@ -0,0 +1,170 @@
+import os
+import tempfile
+import threading
+import weakref
+import numpy as np
+
+
+def _stamp(path):
+    # Columns without a file behind them (in-memory data) never change
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class ModeStore:
+    """
+    Lazily populated mode matrix.
+
+    Each mode file contributes one normalised (mode, direction) column,
+    loaded on first request and kept afterwards. Columns live in one
+    preallocated matrix whose capacity doubles as modes are added, so
+    raising the mode count only loads and copies the new columns. Entries
+    are checked against the file size and modification time, so an
+    edited file is loaded again; the matrix is then copied before the
+    column is overwritten, leaving earlier views unchanged.
+
+    The matrix can be stored as float32 to halve its size and, with a
+    directory, as a memory-mapped file so that only the pages in use are
+    held in RAM.
+    """
+
+    def __init__(self, capacity=8, dtype=np.float64, directory=None):
+        self.capacity = capacity
+        self.dtype = np.dtype(dtype)
+        self.directory = directory
+        self.data = None
+        self.positions = {}
+        self.stamps = {}
+        self.n_columns = 0
+
+    def _allocate(self, n_rows, n_columns):
+        if self.directory is None:
+            return np.empty((n_rows, n_columns), dtype=self.dtype)
+        os.makedirs(self.directory, exist_ok=True)
+        fd, path = tempfile.mkstemp(prefix='modes-', suffix='.npy', dir=self.directory)
+        os.close(fd)
+        data = np.lib.format.open_memmap(path, mode='w+', dtype=self.dtype, shape=(n_rows, n_columns))
+        if os.name == 'posix':
+            # The mapping stays valid after the name is removed
+            _remove(path)
+        else:
+            weakref.finalize(data, _remove, path)
+        return data
+
+    def missing(self, paths):
+        """Return the mode files that are not loaded or have changed on disk"""
+        return [path for path in paths if path not in self.stamps or self.stamps[path] != _stamp(path)]
+
+    def store(self, paths, block):
+        """Store the normalised columns of a (n_nodes x len(paths)) block"""
+        if self.data is not None and block.shape[0] != self.data.shape[0]:
+            # A different mesh: start over
+            self.clear()
+        if self.data is None:
+            self.data = self._allocate(block.shape[0], max(self.capacity, block.shape[1]))
+
+        new = sum(path not in self.positions for path in paths)
+        stale = new < len(paths)
+        if stale or self.n_columns + new > self.data.shape[1]:
+            # Reloaded columns go into a fresh copy (copy-on-write), so views
+            # handed out by matrix() keep the data they were created with
+            n_columns = self.data.shape[1]
+            if self.n_columns + new > n_columns:
+                n_columns = max(2 * n_columns, self.n_columns + new)
+            grown = self._allocate(self.data.shape[0], n_columns)
+            grown[:, :self.n_columns] = self.data[:, :self.n_columns]
+            self.data = grown
+
+        for i, path in enumerate(paths):
+            if path not in self.positions:
+                self.positions[path] = self.n_columns
+                self.n_columns += 1
+            self.data[:, self.positions[path]] = block[:, i]
+            self.stamps[path] = _stamp(path)
+
+    def matrix(self, paths):
+        """
+        Return the mode matrix for the given mode files.
+
+        When the files are the first columns of the store in order (the usual
+        case when modes are added one after another) a read-only view is
+        returned instead of a copy.
+        """
+        positions = np.array([self.positions[path] for path in paths], dtype=np.intp)
+        if np.array_equal(positions, np.arange(len(paths))):
+            view = self.data[:, :len(paths)]
+            view.flags.writeable = False
+            return view
+        return self.data[:, positions]
+
+    def get(self, paths, loader):
+        """
+        Return the mode matrix, loading only the missing columns.
+
+        Args:
+            paths (list): Mode files, one per column
+            loader (callable): loader(paths) returning their normalised columns
+
+        Returns:
+            np.ndarray: Mode matrix (n_nodes x len(paths))
+        """
+        missing = self.missing(paths)
+        if missing:
+            block = loader(missing)
+            if self.data is not None and block.shape[0] != self.data.shape[0]:
+                # A different mesh invalidates every stored column
+                self.clear()
+                missing, block = paths, loader(paths)
+            self.store(missing, block)
+        return self.matrix(paths)
+
+    def clear(self):
+        self.data = None
+        self.positions.clear()
+        self.stamps.clear()
+        self.n_columns = 0
+
+
+class DatasetSession:
+    """
+    Parsed input data kept in memory across optimisation runs.
+
+    Coordinates are stored per XYZ file and the mode columns in a ModeStore
+    (normalisation is per column, so a column does not depend on which
+    other modes are selected). The lock lets concurrent jobs share one
+    load instead of repeating it.
+
+    Args:
+        mode_dtype: Storage type of the mode matrix (np.float32 halves its size)
+        mode_dir (str): Directory for a memory-mapped mode matrix (None keeps it in RAM)
+    """
+
+    def __init__(self, mode_dtype=np.float64, mode_dir=None):
+        self.lock = threading.RLock()
+        self.nodes = {}
+        self.modes = ModeStore(dtype=mode_dtype, directory=mode_dir)
+
+    def get_nodes(self, path):
+        """Return the stored coordinates of an XYZ file, or None"""
+        entry = self.nodes.get(path)
+        if entry is None or entry[0] != _stamp(path):
+            return None
+        return entry[1]
+
+    def put_nodes(self, path, nodes):
+        self.nodes[path] = (_stamp(path), nodes)
+
+    def clear(self):
+        with self.lock:
+            self.nodes.clear()
+            self.modes.clear()
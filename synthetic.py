@@ -0,0 +1,204 @@
+"""
+Synthetic mode shapes and coordinates for benchmarks and experiments.
+
+Analytical modes of a simply supported beam (bending in two planes,
+torsion and axial modes) or a simply supported plate (Kirchhoff bending
+modes) are evaluated on a regular mesh of any size. The structure is
+tilted slightly so that every mode has non-zero X, Y and Z components,
+as in an FE export of a skewed model. Data can be used in memory or
+written as Excel fixtures in the layout the GUI expects.
+"""
+import os
+import numpy as np
+import pandas as pd
+
+COORD_COLUMNS = ['X Location (mm)', 'Y Location (mm)', 'Z Location (mm)']
+MODE_COLUMN = 'Directional Deformation (mm)'
+
+
+def _tilt(vectors, angles=(0.02, 0.03, 0.05)):
+    """Rotate row vectors by small angles (rad) about the X, Y and Z axes"""
+    ax, ay, az = angles
+    rx = np.array([[1, 0, 0], [0, np.cos(ax), -np.sin(ax)], [0, np.sin(ax), np.cos(ax)]])
+    ry = np.array([[np.cos(ay), 0, np.sin(ay)], [0, 1, 0], [-np.sin(ay), 0, np.cos(ay)]])
+    rz = np.array([[np.cos(az), -np.sin(az), 0], [np.sin(az), np.cos(az), 0], [0, 0, 1]])
+    return vectors @ (rz @ ry @ rx).T
+
+
+def beam_mesh(n_nodes, length=20000.0, width=400.0, height=800.0):
+    """
+    Nodes on the outline of a box-section beam along X.
+
+    Args:
+        n_nodes (int): Number of nodes
+        length (float): Beam length (mm)
+        width (float): Section width along Y (mm)
+        height (float): Section height along Z (mm)
+
+    Returns:
+        np.ndarray: Node coordinates (n_nodes x 3)
+    """
+    # Four corners and four edge midpoints per section
+    section = np.array([[-1, -1], [0, -1], [1, -1], [1, 0], [1, 1], [0, 1], [-1, 1], [-1, 0]], dtype=float)
+    section *= [width / 2, height / 2]
+    n_sections = -(-n_nodes // len(section))
+    x = np.linspace(0.0, length, n_sections)
+    nodes = np.empty((n_sections, len(section), 3))
+    nodes[:, :, 0] = x[:, None]
+    nodes[:, :, 1:] = section[None]
+    return nodes.reshape(-1, 3)[:n_nodes]
+
+
+def plate_mesh(n_nodes, length=10000.0, width=6000.0, thickness=200.0):
+    """
+    Nodes on the top and bottom faces of a rectangular plate.
+
+    Args:
+        n_nodes (int): Number of nodes
+        length (float): Plate length along X (mm)
+        width (float): Plate width along Y (mm)
+        thickness (float): Plate thickness along Z (mm)
+
+    Returns:
+        np.ndarray: Node coordinates (n_nodes x 3)
+    """
+    per_face = -(-n_nodes // 2)
+    nx = max(2, int(np.ceil(np.sqrt(per_face * length / width))))
+    ny = max(2, -(-per_face // nx))
+    x, y = np.meshgrid(np.linspace(0.0, length, nx), np.linspace(0.0, width, ny), indexing='ij')
+    face = np.column_stack([x.ravel(), y.ravel()])
+    nodes = np.vstack([np.column_stack([face, np.full(len(face), z)]) for z in (thickness / 2, -thickness / 2)])
+    return nodes[:n_nodes]
+
+
+def beam_modes(nodes, n_modes, length=None):
+    """
+    Simply supported beam modes evaluated at the nodes.
+
+    Bending about both section axes, torsion and axial modes are ranked
+    by their natural frequency and the n_modes lowest are kept.
+
+    Args:
+        nodes (np.ndarray): Node coordinates from beam_mesh (untilted)
+        n_modes (int): Number of modes
+        length (float): Beam length (defaults to the mesh extent along X)
+
+    Returns:
+        tuple: (displacements (n_modes x n_nodes x 3), frequencies in Hz)
+    """
+    x, y, z = nodes.T
+    length = length or np.ptp(x)
+    depth_y = np.ptp(y) or 1.0
+    depth_z = np.ptp(z) or 1.0
+    candidates = []
+    for k in range(1, n_modes + 1):
+        kx = k * np.pi / length
+        # Bending frequencies scale with k^2 and the section depth
+        candidates.append((k**2 * depth_z, 'bend_z', kx))
+        candidates.append((k**2 * depth_y, 'bend_y', kx))
+        # Torsion and axial frequencies scale with k
+        candidates.append((k * 40.0 * depth_z, 'torsion', kx))
+        candidates.append((k * 400.0 * depth_z, 'axial', kx))
+    candidates.sort(key=lambda candidate: candidate[0])
+
+    modes = np.zeros((n_modes, len(nodes), 3))
+    for mode, (_, family, kx) in zip(modes, candidates[:n_modes]):
+        shape, slope = np.sin(kx * x), kx * np.cos(kx * x)
+        if family == 'bend_z':
+            mode[:, 2] = shape
+            mode[:, 0] = -z * slope
+        elif family == 'bend_y':
+            mode[:, 1] = shape
+            mode[:, 0] = -y * slope
+        elif family == 'torsion':
+            twist = shape / max(depth_y, depth_z)
+            mode[:, 1] = -z * twist
+            mode[:, 2] = y * twist
+        else:
+            mode[:, 0] = shape
+    omega = np.array([candidate[0] for candidate in candidates[:n_modes]])
+    return modes, 1.5 * omega / omega[0]
+
+
+def plate_modes(nodes, n_modes):
+    """
+    Simply supported Kirchhoff plate modes evaluated at the nodes.
+
+    Args:
+        nodes (np.ndarray): Node coordinates from plate_mesh (untilted)
+        n_modes (int): Number of modes
+
+    Returns:
+        tuple: (displacements (n_modes x n_nodes x 3), frequencies in Hz)
+    """
+    x, y, z = nodes.T
+    a, b = np.ptp(x), np.ptp(y)
+    limit = n_modes + 1
+    pairs = sorted(((m / a)**2 + (n / b)**2, m, n) for m in range(1, limit) for n in range(1, limit))
+    modes = np.empty((n_modes, len(nodes), 3))
+    for mode, (_, m, n) in zip(modes, pairs[:n_modes]):
+        kx, ky = m * np.pi / a, n * np.pi / b
+        w = np.sin(kx * x) * np.sin(ky * y)
+        # In-plane displacements follow from the rotation of the normal
+        mode[:, 0] = -z * kx * np.cos(kx * x) * np.sin(ky * y)
+        mode[:, 1] = -z * ky * np.sin(kx * x) * np.cos(ky * y)
+        mode[:, 2] = w
+    omega = np.array([pair[0] for pair in pairs[:n_modes]])
+    return modes, 1.5 * omega / omega[0]
+
+
+def synthetic_dataset(kind='plate', n_nodes=1000, n_modes=6, noise=0.0, seed=0):
+    """
+    Build a synthetic dataset in the layout used by SensorOptimizer.
+
+    Args:
+        kind (str): 'beam' or 'plate'
+        n_nodes (int): Number of nodes
+        n_modes (int): Number of modes
+        noise (float): Standard deviation of added noise, relative to each column's peak
+        seed (int): Seed of the noise generator
+
+    Returns:
+        tuple: (nodes (n_nodes x 3), raw mode matrix (n_nodes x 3*n_modes,
+            columns DEFX1, DEFY1, DEFZ1, DEFX2, ...), modal frequencies)
+    """
+    if kind == 'beam':
+        nodes = beam_mesh(n_nodes)
+        modes, frequencies = beam_modes(nodes, n_modes)
+    elif kind == 'plate':
+        nodes = plate_mesh(n_nodes)
+        modes, frequencies = plate_modes(nodes, n_modes)
+    else:
+        raise ValueError(f"Unknown synthetic structure '{kind}', expected 'beam' or 'plate'")
+
+    nodes = _tilt(nodes)
+    # Mode m, direction d goes to column 3*m + d
+    mode_matrix = _tilt(modes).transpose(1, 0, 2).reshape(len(nodes), 3 * n_modes)
+    if noise:
+        rng = np.random.default_rng(seed)
+        mode_matrix = mode_matrix + noise * np.max(np.abs(mode_matrix), axis=0) * rng.standard_normal(mode_matrix.shape)
+    return nodes, mode_matrix, frequencies
+
+
+def write_fixtures(directory, nodes, mode_matrix):
+    """
+    Write a dataset as the Excel files the GUI loads.
+
+    Args:
+        directory (str): Output directory
+        nodes (np.ndarray): Node coordinates
+        mode_matrix (np.ndarray): Mode matrix with columns DEFX1, DEFY1, DEFZ1, ...
+
+    Returns:
+        tuple: (XYZ file path, list of mode file paths in column order)
+    """
+    os.makedirs(directory, exist_ok=True)
+    xyz_file = os.path.join(directory, 'XYZ.xlsx')
+    pd.DataFrame(nodes, columns=COORD_COLUMNS).to_excel(xyz_file, index=False)
+    mode_files = []
+    for column in range(mode_matrix.shape[1]):
+        mode, direction = divmod(column, 3)
+        path = os.path.join(directory, f"DEF{'XYZ'[direction]}{mode + 1}.xlsx")
+        pd.DataFrame({MODE_COLUMN: mode_matrix[:, column]}).to_excel(path, index=False)
+        mode_files.append(path)
+    return xyz_file, mode_files